@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from foodgram import db_connections  # noqa: F401
+
+        from .services import register_fonts
+        register_fonts()
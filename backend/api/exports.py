@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram.executors import get_executor
+
+from .services import write_shopping_list_pdf
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KEY = 'export:{}:{}'
+CLEANUP_KEY = 'export-cleanup'
+CLEANUP_INTERVAL = 10 * 60
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def get_export_id(rows):
+    """
+    Хеш содержимого списка покупок: одинаковые списки
+    получают один и тот же файл.
+    """
+    content = json.dumps(rows, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get_export_path(user_id, export_id):
+    """
+    Файлы лежат под id владельца: чужой id задачи ведёт к файлу,
+    которого у пользователя нет.
+    """
+    return os.path.join(
+        settings.EXPORTS_ROOT,
+        f'shopping_list_{user_id}_{export_id}.pdf'
+        )
+
+
+def is_expired(path):
+    return os.path.getmtime(path) < time.time() - settings.EXPORT_TIMEOUT
+
+
+def remove_expired_exports():
+    """
+    Удаляет файлы EXPORTS_ROOT старше EXPORT_TIMEOUT, в том числе
+    временные файлы прерванных сборок.
+    """
+    with os.scandir(settings.EXPORTS_ROOT) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and is_expired(entry.path):
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def schedule_cleanup():
+    if cache.add(CLEANUP_KEY, True, CLEANUP_INTERVAL):
+        get_executor(
+            'exports',
+            settings.EXPORT_WORKERS
+            ).submit(remove_expired_exports)
+
+
+def render_export(user_id, export_id, rows):
+    path = get_export_path(user_id, export_id)
+    os.makedirs(settings.EXPORTS_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.EXPORTS_ROOT)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_shopping_list_pdf(rows, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    schedule_cleanup()
+
+
+def run_export(user_id, export_id, rows):
+    key = EXPORT_KEY.format(user_id, export_id)
+    try:
+        render_export(user_id, export_id, rows)
+    except Exception:
+        logger.exception('Не удалось собрать список покупок %s', export_id)
+        cache.set(key, FAILED, settings.EXPORT_TIMEOUT)
+    else:
+        cache.set(key, DONE, settings.EXPORT_TIMEOUT)
+
+
+def get_export_status(user_id, export_id):
+    path = get_export_path(user_id, export_id)
+    try:
+        if not is_expired(path):
+            return DONE
+    except FileNotFoundError:
+        pass
+    status = cache.get(EXPORT_KEY.format(user_id, export_id))
+    # Файл удалён очисткой раньше, чем истёк статус.
+    return None if status == DONE else status
+
+
+def start_export(user_id, rows):
+    """
+    Ставит сборку PDF в пул потоков процесса и сразу возвращает id задачи.
+    Готовый файл и уже запущенная сборка переиспользуются, упавшая
+    сборка и пропавший файл собираются заново.
+    """
+    rows = list(rows)
+    export_id = get_export_id(rows)
+    key = EXPORT_KEY.format(user_id, export_id)
+    export_status = get_export_status(user_id, export_id)
+    if export_status == DONE:
+        return export_id, DONE
+    if export_status != PENDING:
+        # Упавшая сборка или файл, удалённый раньше статуса.
+        cache.delete(key)
+    if cache.add(key, PENDING, settings.EXPORT_TIMEOUT):
+        get_executor(
+            'exports',
+            settings.EXPORT_WORKERS
+            ).submit(run_export, user_id, export_id, rows)
+    return export_id, get_export_status(user_id, export_id)
@@ -0,0 +1,78 @@
+import base64
+import binascii
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+from rest_framework.fields import ImageField
+
+from recipes.images import VARIANTS, get_variant_name
+from recipes.models import Recipe
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Base64ImageField, который называет файл по sha256 содержимого.
+    Если такая картинка уже загружена, возвращается имя существующего
+    файла без повторной проверки Pillow и без записи на диск.
+    """
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        base64_data = base64_data.rpartition(';base64,')[2]
+        try:
+            decoded_file = base64.b64decode(base64_data)
+        except (TypeError, binascii.Error, ValueError):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        file_extension = self.get_file_extension(None, decoded_file)
+        if file_extension not in self.ALLOWED_TYPES:
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        file_name = '{}.{}'.format(
+            hashlib.sha256(decoded_file).hexdigest(),
+            file_extension
+            )
+        name = Recipe._meta.get_field('image').generate_filename(
+            None,
+            file_name
+            )
+        if default_storage.exists(name):
+            return name
+        return ImageField.to_internal_value(
+            self,
+            SimpleUploadedFile(name=file_name, content=decoded_file)
+            )
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Ссылки на уменьшенные копии картинки рецепта из
+    recipes.images.VARIANTS. Пока копия не отмечена в
+    Recipe.image_variants, отдаётся ссылка на исходную картинку.
+    source - сам рецепт ('*' или поле со связанным рецептом).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        image = recipe.image
+        if not image:
+            return None
+        created = recipe.image_variants.split(',')
+        request = self.context.get('request')
+        variants = {}
+        for variant in VARIANTS:
+            name = image.name
+            if variant in created:
+                name = get_variant_name(image.name, variant)
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[variant] = url
+        return variants
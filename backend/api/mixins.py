@@ -0,0 +1,77 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from foodgram.db_router import use_primary
+from foodgram.metrics import record_cache
+from recipes.versions import get_version
+
+
+class VersionedCacheMixin:
+    """
+    Кеширует ответы list/retrieve под версией набора данных
+    cache_version_name и отвечает 304 на If-None-Match/If-Modified-Since.
+    Версия меняется сигналами при сохранении и удалении моделей.
+    """
+    cache_version_name = None
+
+    def perform_authentication(self, request):
+        # Справочники доступны всем: для чтения не ищем токен в базе.
+        if request.method not in SAFE_METHODS:
+            super().perform_authentication(request)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+            )
+
+    def get_cache_key(self, request, version):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'response:{self.cache_version_name}:{version}:{path}'
+
+    def is_not_modified(self, request, etag, version):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+            )
+        return (
+            if_modified_since is not None
+            and if_modified_since >= version // 1000
+            )
+
+    def cached_response(self, get_response, request, *args, **kwargs):
+        version = get_version(self.cache_version_name)
+        etag = f'"{self.cache_version_name}-{version}"'
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(version / 1000),
+            }
+        if self.is_not_modified(request, etag, version):
+            record_cache(self.cache_version_name, True)
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        key = self.get_cache_key(request, version)
+        data = cache.get(key)
+        record_cache(self.cache_version_name, data is not None)
+        if data is None:
+            with use_primary():
+                response = get_response(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
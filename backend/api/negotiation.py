@@ -0,0 +1,10 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatNegotiation(DefaultContentNegotiation):
+    """
+    ?format= выбирает формат файла, а не рендерер DRF:
+    ответы с данными и ошибками всегда отдаются первым рендерером.
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
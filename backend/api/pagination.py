@@ -1,4 +1,26 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class CustomCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = 'id'
+
+
+class CursorPaginationMixin:
+    """
+    Курсорная пагинация по требованию клиента: параметр cursor
+    (в том числе пустой для первой страницы) включает её вместо page/limit.
+    Страницы идут по индексу id и не считают COUNT(*).
+    """
+    cursor_pagination_class = CustomCursorPagination
+
+    @property
+    def paginator(self):
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if (not hasattr(self, '_paginator')
+                and cursor_query_param in self.request.query_params):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
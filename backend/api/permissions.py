@@ -1,3 +1,6 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
 from rest_framework import permissions
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
@@ -79,3 +82,18 @@ class IsAuthorOrAdmin(BasePermission):
               and (request.user == obj.author or request.user.is_admin)):
             return True
         return False
+
+
+class IsMetricsScraper(BasePermission):
+    """
+    Доступ с адресов из METRICS_ALLOWED_IPS (адреса или подсети).
+    """
+    def has_permission(self, request, view):
+        try:
+            address = ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(
+            address in ip_network(network)
+            for network in settings.METRICS_ALLOWED_IPS
+            )
@@ -0,0 +1,32 @@
+"""
+Допустимое число SQL-запросов на маршрут API.
+
+Бюджеты проверяет tests/test_query_budgets.py на холодном кеше от имени
+пользователя с подписками, избранным и списком покупок; BEGIN/SAVEPOINT
+не считаются. {recipe} - чужой рецепт не из его избранного и списка
+покупок, {liked} - рецепт из обоих; {author} - автор, на которого он
+не подписан, {followed} - автор, на которого подписан.
+"""
+
+QUERY_BUDGETS = (
+    ('recipes-list', 'get', '/api/recipes/', 9),
+    ('recipes-list-favorited', 'get', '/api/recipes/?is_favorited=1', 6),
+    ('recipes-detail', 'get', '/api/recipes/{recipe}/', 5),
+    ('users-list', 'get', '/api/users/', 4),
+    ('users-detail', 'get', '/api/users/{author}/', 3),
+    ('users-me', 'get', '/api/users/me/', 2),
+    ('subscriptions', 'get', '/api/users/subscriptions/?recipes_limit=3', 4),
+    ('subscribe', 'get', '/api/users/{author}/subscribe/', 5),
+    ('unsubscribe', 'delete', '/api/users/{followed}/subscribe/', 4),
+    ('favorite', 'get', '/api/recipes/{recipe}/favorite/', 4),
+    ('unfavorite', 'delete', '/api/recipes/{liked}/favorite/', 4),
+    ('shopping-cart', 'get', '/api/recipes/{recipe}/shopping_cart/', 4),
+    ('shopping-cart-remove', 'delete',
+     '/api/recipes/{liked}/shopping_cart/', 4),
+    ('download-shopping-cart', 'get',
+     '/api/recipes/download_shopping_cart/', 2),
+    ('download-shopping-cart-csv', 'get',
+     '/api/recipes/download_shopping_cart/?format=csv', 2),
+    ('ingredients-search', 'get', '/api/ingredients/?name=sa', 1),
+    ('tags-list', 'get', '/api/tags/', 1),
+)
@@ -1,13 +1,16 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
-from rest_framework import serializers, status
-from rest_framework.response import Response
+from rest_framework import serializers
 
+from recipes.images import schedule_image_processing
 from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
                             Recipe, ShoppingCart, Tag, TagRecipe)
 from users.models import CustomUser
 
+from .fields import ImageVariantsField, RecipeImageField
+
 
 class UserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
@@ -28,10 +31,26 @@ class UserSerializer(UserSerializer):
             }
     
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=request.user, author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in self.get_subscriptions()
+
+    def get_subscriptions(self):
+        """
+        id авторов, на которых подписан текущий пользователь.
+        Запрашиваются один раз и хранятся в общем context,
+        так что список пользователей обходится одним запросом.
+        """
+        if 'subscriptions' not in self.context:
+            request = self.context.get('request')
+            if request is None or request.user.is_anonymous:
+                subscriptions = set()
+            else:
+                subscriptions = set(Follow.objects.filter(
+                    user=request.user
+                    ).values_list('author_id', flat=True))
+            self.context['subscriptions'] = subscriptions
+        return self.context['subscriptions']
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -82,14 +101,17 @@ class ListRecipeSerializer(serializers.ModelSerializer):
         many=True,
         required=False
         )
+    image_variants = ImageVariantsField(source='*')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ('favorites_count', 'shopping_carts_count')
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         fav_user = self.context.get("user_id")
         fav_item = obj.id
         return Favorite.objects.filter(
@@ -98,11 +120,22 @@ class ListRecipeSerializer(serializers.ModelSerializer):
                 ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         owner = self.context.get("user_id")
         item = obj.id
         return ShoppingCart.objects.filter(owner=owner, item=item).exists()
 
 
+class ShortRecipeSerializer(serializers.ModelSerializer):
+    image = Base64ImageField(read_only=True)
+    image_variants = ImageVariantsField(source='*')
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagRecipeSerializer(
         source='tagrecipe_set',
@@ -115,7 +148,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         required=False
         )
-    image = Base64ImageField(
+    image = RecipeImageField(
         max_length=None, use_url=True,
     )
 
@@ -126,169 +159,133 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
         model = Recipe
 
-    def create(self, validated_data):
-        tags = validated_data.pop('tagrecipe_set')
-        ingredients = validated_data.pop('ingredientamount_set')
-        recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            current_tag = get_object_or_404(Tag, id=tag.get('tag').get('id'))
-            TagRecipe.objects.create(
-                tag=current_tag, recipe=recipe)
-        flipped = []
-        for ingredient in ingredients:
-            if ingredient not in flipped:
-                flipped.append(ingredient)
-            else:
-                raise serializers.ValidationError(
-                    'Ингредиенты не должны повторяться')
-            if ingredient.get('amount') < 0:
+    def validate(self, data):
+        tags = data.get('tagrecipe_set')
+        if tags is not None:
+            tags_id = {tag['tag']['id'] for tag in tags}
+            if len(tags_id) != Tag.objects.filter(id__in=tags_id).count():
+                raise serializers.ValidationError('Такого тега не существует')
+            data['tagrecipe_set'] = tags_id
+        ingredients = data.get('ingredientamount_set')
+        if ingredients is not None:
+            amounts = {}
+            for ingredient in ingredients:
+                ingredient_id = ingredient['ingredient']['id']
+                if ingredient_id in amounts:
+                    raise serializers.ValidationError(
+                        'Ингредиенты не должны повторяться')
+                if ingredient['amount'] < 0:
+                    raise serializers.ValidationError(
+                        'Количество ингредиентов должно быть больше нуля')
+                amounts[ingredient_id] = ingredient['amount']
+            if len(amounts) != Ingredient.objects.filter(
+                    id__in=amounts).count():
                 raise serializers.ValidationError(
-                    'Количество ингредиентов должно быть больше нуля')
-            current_ingredient = get_object_or_404(
-                Ingredient,
-                id=ingredient.get('ingredient').get('id')
-                )
-            IngredientAmount.objects.create(
-                ingredient=current_ingredient,
-                recipe=recipe,
-                amount=ingredient.get('amount')
-                )
-        return recipe
+                    'Такого ингредиента не существует')
+            data['ingredientamount_set'] = amounts
+        return data
 
-    def update(self, instance, validated_data):
-        tags = validated_data.pop('tagrecipe_set')
-        ingredients = validated_data.pop('ingredientamount_set')
-        Recipe.objects.filter(id=instance.id).update(**validated_data)
-        recipe = get_object_or_404(Recipe, id=instance.id)
-        recipe.tags.remove()
-        recipe_ingredients = IngredientAmount.objects.filter(
-            recipe_id=instance.id
-            )
-        if not recipe_ingredients:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        recipe_ingredients.delete()
-        recipe_tags = TagRecipe.objects.filter(
-            recipe_id=instance.id
+    def set_tags(self, recipe, tags_id):
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag_id=tag_id, recipe=recipe) for tag_id in tags_id
             )
-        if not recipe_tags:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        recipe_tags.delete()
-        for tag in tags:
-            current_tag = get_object_or_404(Tag, id=tag.get('tag').get('id'))
-            TagRecipe.objects.create(
-                tag=current_tag, recipe=recipe)
-        for ingredient in ingredients:
-            current_ingredient = get_object_or_404(
-                Ingredient,
-                id=ingredient.get('ingredient').get('id')
-                )
-            IngredientAmount.objects.create(
-                ingredient=current_ingredient,
+
+    def set_ingredients(self, recipe, amounts):
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                ingredient_id=ingredient_id,
                 recipe=recipe,
-                amount=ingredient.get('amount')
+                amount=amount
                 )
-        return recipe
-
-
-class ShoppingCartCreateSerializer(serializers.ModelSerializer):
-    item = serializers.IntegerField(source='item.id')
-    owner = serializers.IntegerField(source='owner.id')
+            for ingredient_id, amount in amounts.items()
+            )
 
-    class Meta:
-        model = ShoppingCart
-        fields = ['item', 'owner']
+    def prefetch(self, recipe):
+        recipe._prefetched_objects_cache = {}
+        prefetch_related_objects(
+            [recipe],
+            Prefetch(
+                'tagrecipe_set',
+                queryset=TagRecipe.objects.select_related('tag')
+                ),
+            Prefetch(
+                'ingredientamount_set',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+                ),
+            )
+        return recipe
 
+    def set_image_variants(self, validated_data):
+        """
+        Уже загруженная картинка приходит именем файла: её копии
+        берутся у рецепта с той же картинкой.
+        """
+        image = validated_data.get('image')
+        if isinstance(image, str):
+            validated_data['image_variants'] = Recipe.objects.filter(
+                image=image
+                ).exclude(image_variants='').values_list(
+                'image_variants',
+                flat=True
+                ).first() or ''
+        elif image is not None:
+            validated_data['image_variants'] = ''
+
+    def schedule_image(self, recipe, validated_data):
+        # Новая картинка или уже загруженная, копии которой не отмечены.
+        if validated_data.get('image') is not None and not (
+                recipe.image_variants):
+            schedule_image_processing(recipe.image.name)
+
+    @transaction.atomic
     def create(self, validated_data):
-        item = get_object_or_404(
-            Recipe,
-            pk=validated_data.get('item').get('id')
-            )
-        owner = validated_data.get('owner')
-        return ShoppingCart.objects.create(item=item, owner=owner)
+        tags_id = validated_data.pop('tagrecipe_set', ())
+        amounts = validated_data.pop('ingredientamount_set', {})
+        self.set_image_variants(validated_data)
+        recipe = Recipe.objects.create(**validated_data)
+        self.schedule_image(recipe, validated_data)
+        self.set_tags(recipe, tags_id)
+        self.set_ingredients(recipe, amounts)
+        return self.prefetch(recipe)
 
-    def validate(self, data):
-        print(data)
-        if ShoppingCart.objects.filter(
-                item__id=data.get('item').get('id'),
-                owner__id=data.get('owner').get('id')).exists():
-            raise serializers.ValidationError(
-                'Вы уже добавили в список покупок'
-                )
-        return data
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        tags_id = validated_data.pop('tagrecipe_set', None)
+        amounts = validated_data.pop('ingredientamount_set', None)
+        self.set_image_variants(validated_data)
+        recipe = super().update(instance, validated_data)
+        self.schedule_image(recipe, validated_data)
+        if tags_id is not None:
+            TagRecipe.objects.filter(recipe=recipe).delete()
+            self.set_tags(recipe, tags_id)
+        if amounts is not None:
+            IngredientAmount.objects.filter(recipe=recipe).delete()
+            self.set_ingredients(recipe, amounts)
+        return self.prefetch(recipe)
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='item.id')
     name = serializers.ReadOnlyField(source='item.name')
     image = Base64ImageField(read_only=True, source='item.image')
+    image_variants = ImageVariantsField(source='item')
     cooking_time = serializers.ReadOnlyField(source='item.cooking_time')
 
     class Meta:
         model = ShoppingCart
-        fields = ['id', 'name', 'image', 'cooking_time']
-
-
-class FavoriteCreateSerializer(serializers.ModelSerializer):
-    fav_item = serializers.IntegerField(source='fav_item.id')
-    fav_user = serializers.IntegerField(source='fav_user.id')
-
-    class Meta:
-        model = Favorite
-        fields = ['fav_item', 'fav_user']
-
-    def create(self, validated_data):
-        fav_item = get_object_or_404(
-            Recipe,
-            pk=validated_data.get('fav_item').get('id')
-            )
-        fav_user = validated_data.get('fav_user')
-        return Favorite.objects.create(fav_item=fav_item, fav_user=fav_user)
-
-    def validate(self, data):
-        if Favorite.objects.filter(
-                fav_item__id=data.get('fav_item').get('id'),
-                fav_user__id=data.get('fav_user').get('id')).exists():
-            raise serializers.ValidationError(
-                'Вы уже добавили в избранное'
-                )
-        return data
+        fields = ['id', 'name', 'image', 'image_variants', 'cooking_time']
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source='fav_item.id')
     name = serializers.ReadOnlyField(source='fav_item.name')
     image = Base64ImageField(read_only=True, source='fav_item.image')
+    image_variants = ImageVariantsField(source='fav_item')
     cooking_time = serializers.ReadOnlyField(source='fav_item.cooking_time')
 
     class Meta:
         model = Favorite
-        fields = ['id', 'name', 'image', 'cooking_time']
-
-
-class FollowCreateSerializer(serializers.ModelSerializer):
-    user = serializers.IntegerField(source='user.id')
-    author = serializers.IntegerField(source='author.id')
-
-    class Meta:
-        model = Follow
-        fields = ['user', 'author']
-
-    def create(self, validated_data):
-        author = get_object_or_404(
-            CustomUser,
-            pk=validated_data.get('author').get('id')
-            )
-        user = validated_data.get('user')
-        return Follow.objects.create(user=user, author=author)
-
-    def validate(self, data):
-        if Follow.objects.filter(
-                author__id=data.get('author').get('id'),
-                user__id=data.get('user').get('id')).exists():
-            raise serializers.ValidationError(
-                'Вы уже подписаны'
-                )
-        return data
+        fields = ['id', 'name', 'image', 'image_variants', 'cooking_time']
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -315,16 +312,23 @@ class FollowSerializer(serializers.ModelSerializer):
             )
 
     def get_is_subscribed(self, obj):
-        author = obj.author
-        user = obj.user
-        return Follow.objects.filter(author=user, user=author).exists()
+        # Сериализуются только подписки текущего пользователя.
+        return True
 
     def get_recipes(self, obj):
-        author = obj.author
-        recepts_follow = Recipe.objects.filter(author=author)
-        return RecipeSerializer(recepts_follow, many=True).data
+        recipes = self.context.get('recipes')
+        if recipes is None:
+            recipes = Recipe.objects.filter(author=obj.author_id)
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
+        else:
+            recipes = recipes.get(obj.author_id, [])
+        return ShortRecipeSerializer(
+            recipes,
+            many=True,
+            context=self.context
+            ).data
 
     def get_recipes_count(self, obj):
-        author = obj.author
-        count = Recipe.objects.filter(author=author).count()
-        return count
+        return obj.author.recipes_count
@@ -0,0 +1,180 @@
+import csv
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Sum
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from foodgram.db_router import use_primary
+from foodgram.metrics import record_cache
+from recipes.models import (Favorite, Follow, IngredientAmount, Recipe,
+                            ShoppingCart)
+from recipes.versions import get_version
+
+
+def get_shopping_list(user):
+    """
+    Ингредиенты из списка покупок пользователя, сложенные по
+    (name, measurement_unit) одним сгруппированным запросом.
+    """
+    recipes_id = ShoppingCart.objects.filter(owner=user).values('item')
+    return IngredientAmount.objects.filter(
+        recipe__in=recipes_id
+        ).values(
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+        ).annotate(
+        total=Sum('amount')
+        ).order_by('name', 'measurement_unit')
+
+
+def get_viewer_state(user):
+    """
+    id избранных рецептов, рецептов в списке покупок и авторов в подписках
+    пользователя. Кешируется под версией 'user:<id>'.
+    """
+    key = f'viewer:{user.id}:{get_version(f"user:{user.id}")}'
+    state = cache.get(key)
+    record_cache('viewer', state is not None)
+    if state is None:
+        with use_primary():
+            state = (
+                set(Favorite.objects.filter(
+                    fav_user=user
+                    ).values_list('fav_item_id', flat=True)),
+                set(ShoppingCart.objects.filter(
+                    owner=user
+                    ).values_list('item_id', flat=True)),
+                set(Follow.objects.filter(
+                    user=user
+                    ).values_list('author_id', flat=True)),
+                )
+        cache.set(key, state, settings.API_CACHE_TIMEOUT)
+    return state
+
+
+def get_recipes_limit(request):
+    try:
+        recipes_limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return max(recipes_limit, 0)
+
+
+def get_recipes_by_author(author_ids, recipes_limit=None):
+    """
+    Рецепты авторов одним запросом, сгруппированные по author_id.
+    При recipes_limit каждому автору достаются только первые N рецептов:
+    их отбирает ROW_NUMBER() OVER (PARTITION BY author_id).
+    """
+    recipes = defaultdict(list)
+    if not author_ids:
+        return recipes
+    if recipes_limit is None:
+        queryset = Recipe.objects.filter(author__in=author_ids).only(
+            'id', 'author', 'name', 'image', 'image_variants', 'cooking_time'
+            )
+    else:
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        queryset = Recipe.objects.raw(
+            f'''SELECT id, author_id, name, image, image_variants,
+                       cooking_time FROM (
+                SELECT id, author_id, name, image, image_variants,
+                       cooking_time,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY author_id ORDER BY id
+                       ) AS recipe_rank
+                FROM {connection.ops.quote_name(Recipe._meta.db_table)}
+                WHERE author_id IN ({placeholders})
+            ) AS ranked
+            WHERE recipe_rank <= %s
+            ORDER BY author_id, id''',
+            [*author_ids, recipes_limit]
+            )
+    for recipe in queryset:
+        recipes[recipe.author_id].append(recipe)
+    return recipes
+
+
+def format_shopping_list_line(row):
+    return f'{row["name"]} ({row["measurement_unit"]}) – {row["total"]}'
+
+
+def register_fonts():
+    """
+    Разбор TTF дорогой, поэтому шрифт регистрируется один раз на процесс.
+    """
+    if 'FreeSans' not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(
+            'FreeSans',
+            settings.STATIC_ROOT+'/FreeSans.ttf')
+            )
+
+
+def write_shopping_list_pdf(rows, buf):
+    """
+    PDF со списком покупок; строки, не поместившиеся на странице,
+    переносятся на следующую.
+    """
+    register_fonts()
+    width, height = letter
+    c = canvas.Canvas(buf, pagesize=letter, bottomup=0)
+    textob = None
+    for row in rows:
+        if textob is None or textob.getY() > height - inch:
+            if textob is not None:
+                c.drawText(textob)
+                c.showPage()
+            textob = c.beginText()
+            textob.setTextOrigin(inch, inch)
+            textob.setFont("FreeSans", 14)
+        textob.textLine(format_shopping_list_line(row))
+    if textob is not None:
+        c.drawText(textob)
+    c.showPage()
+    c.save()
+
+
+class Echo:
+    """
+    Псевдо-файл для csv.writer: write() возвращает строку,
+    не накапливая её в памяти.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_shopping_list_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'total'))
+    for row in rows:
+        yield writer.writerow(
+            (row['name'], row['measurement_unit'], row['total'])
+            )
+
+
+def iter_shopping_list_txt(rows):
+    for row in rows:
+        yield format_shopping_list_line(row) + '\n'
+
+
+def iter_shopping_list_json(rows):
+    separator = '['
+    for row in rows:
+        yield separator + json.dumps(row, ensure_ascii=False)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'csv': (iter_shopping_list_csv, 'text/csv; charset=utf-8'),
+    'txt': (iter_shopping_list_txt, 'text/plain; charset=utf-8'),
+    'json': (iter_shopping_list_json, 'application/json'),
+}
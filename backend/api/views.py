@@ -1,35 +1,41 @@
-import io
+import hashlib
 
 from django.conf import settings
-from django.db.models import Sum
-from django.http import FileResponse
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import (permissions, status, views,
                             viewsets)
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from foodgram.db_router import use_primary
+from foodgram.metrics import record_cache, render_metrics
 from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
-                            Recipe, ShoppingCart, Tag)
+                            Recipe, ShoppingCart, Tag, TagRecipe)
+from recipes.search import ingredient_index
+from recipes.versions import get_version
 from users.models import CustomUser
 
+from .exports import DONE, get_export_path, get_export_status, start_export
 from .filterset import IngredientFilter, RecipeFilter
-from .pagination import CustomPagination
-from .permissions import (IsAdmin, IsAuthorOrAdmin,
+from .mixins import VersionedCacheMixin
+from .negotiation import IgnoreFormatNegotiation
+from .pagination import CursorPaginationMixin, CustomPagination
+from .permissions import (IsAdmin, IsAuthorOrAdmin, IsMetricsScraper,
                           IsSuperuser)
-from .serializers import (FavoriteCreateSerializer, FavoriteSerializer,
-                          FollowCreateSerializer, FollowSerializer,
+from .serializers import (FavoriteSerializer, FollowSerializer,
                           IngredientSerializer, ListRecipeSerializer,
-                          RecipeSerializer, ShoppingCartCreateSerializer,
-                          ShoppingCartSerializer, TagSerializer,
-                          UserSerializer)
+                          RecipeSerializer, ShoppingCartSerializer,
+                          TagSerializer, UserSerializer)
+from .services import (SHOPPING_LIST_FORMATS, get_recipes_by_author,
+                       get_recipes_limit, get_shopping_list, get_viewer_state)
 
 BASE_USERNAME = 'User'
 
@@ -68,66 +74,150 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrAdmin,)
-    queryset = Recipe.objects.all()
     serializer_class = ListRecipeSerializer
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilter
     pagination_class = CustomPagination
+    viewer_filters = ('is_favorited', 'is_in_shopping_cart')
+    shared_response = False
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_anonymous or self.shared_response:
+            is_favorited = is_in_shopping_cart = is_subscribed = Value(
+                False, output_field=BooleanField()
+                )
+        else:
+            is_favorited = Exists(Favorite.objects.filter(
+                fav_user=user,
+                fav_item=OuterRef('pk')
+                ))
+            is_in_shopping_cart = Exists(ShoppingCart.objects.filter(
+                owner=user,
+                item=OuterRef('pk')
+                ))
+            is_subscribed = Exists(Follow.objects.filter(
+                user=user,
+                author=OuterRef('pk')
+                ))
+        authors = CustomUser.objects.annotate(is_subscribed=is_subscribed)
+        return Recipe.objects.annotate(
+            is_favorited=is_favorited,
+            is_in_shopping_cart=is_in_shopping_cart,
+            ).prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch(
+                'tagrecipe_set',
+                queryset=TagRecipe.objects.select_related('tag')
+                ),
+            Prefetch(
+                'ingredientamount_set',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+                ),
+            )
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({"user_id": self.request.user.id})
         return context
 
+    def list(self, request, *args, **kwargs):
+        """
+        Общая для всех часть страницы кешируется по фильтрам и странице,
+        флаги текущего пользователя накладываются поверх неё.
+        """
+        if any(name in request.query_params for name in self.viewer_filters):
+            return super().list(request, *args, **kwargs)
+        key = 'recipes:{}:{}'.format(
+            get_version('recipes'),
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            )
+        data = cache.get(key)
+        record_cache('recipes', data is not None)
+        if data is None:
+            self.shared_response = True
+            with use_primary():
+                response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+        if request.user.is_authenticated:
+            favorites, shopping_cart, subscriptions = get_viewer_state(
+                request.user
+                )
+            for recipe in data['results']:
+                recipe['is_favorited'] = recipe['id'] in favorites
+                recipe['is_in_shopping_cart'] = recipe['id'] in shopping_cart
+                recipe['author']['is_subscribed'] = (
+                    recipe['author']['id'] in subscriptions
+                    )
+        return Response(data)
+
     @action(
         detail=False,
         permission_classes=(permissions.IsAuthenticated,),
-        methods=['get', ])
+        methods=['get', 'post'],
+        content_negotiation_class=IgnoreFormatNegotiation)
     def download_shopping_cart(self, request):
-        buf = io.BytesIO()
-        c = canvas.Canvas(buf, pagesize=letter, bottomup=0)
-        pdfmetrics.registerFont(TTFont(
-            'FreeSans',
-            settings.STATIC_ROOT+'/FreeSans.ttf')
+        """
+        С ?format=csv|txt|json GET отдаёт список потоком прямо
+        из курсора. PDF собирается в фоне: POST, как и GET без готового
+        файла, ставит сборку в очередь и возвращает 202 с id задачи
+        для shopping_cart_exports; GET с готовым файлом отдаёт его.
+        """
+        file_format = request.query_params.get('format', 'pdf')
+        if request.method == 'GET' and file_format in SHOPPING_LIST_FORMATS:
+            write_rows, content_type = SHOPPING_LIST_FORMATS[file_format]
+            response = StreamingHttpResponse(
+                write_rows(get_shopping_list(request.user).iterator()),
+                content_type=content_type
+                )
+            response['Content-Disposition'] = (
+                f'attachment; filename="shop.{file_format}"'
+                )
+            return response
+        if file_format != 'pdf':
+            raise ValidationError({'format': 'Неизвестный формат'})
+        export_id, export_status = start_export(
+            request.user.id,
+            get_shopping_list(request.user)
             )
-        textob = c.beginText()
-        textob.setTextOrigin(inch, inch)
-        textob.setFont("FreeSans", 14)
-
-        user = request.user
-        recipes_id = ShoppingCart.objects.filter(owner=user).values('item')
-        ingredients_id = Recipe.objects.filter(
-            id__in=recipes_id
-                ).values('ingredients')
-        ingredients = Ingredient.objects.filter(id__in=ingredients_id)
-
-        lines = []
-
-        for ingredient in ingredients:
-            amount = IngredientAmount.objects.filter(
-                ingredient=ingredient,
-                recipe__in=recipes_id
-                ).aggregate(total_amount=Sum('amount'))["total_amount"]
-
-            lines.append(ingredient.name)
-            lines.append(str(amount))
-            lines.append(" ")
-            lines.append(
-                f'''{ingredient.name} ({ingredient.measurement_unit})
-                 – {str(amount)}'''
+        if request.method == 'POST' or export_status != DONE:
+            return Response(
+                {'id': export_id, 'status': export_status},
+                status=status.HTTP_202_ACCEPTED
                 )
+        return FileResponse(
+            open(get_export_path(request.user.id, export_id), 'rb'),
+            as_attachment=True,
+            filename='shop.pdf'
+            )
 
-        for line in lines:
-            textob.textLine(line)
-
-        c.drawText(textob)
-        c.showPage()
-        c.save()
-        buf.seek(0)
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path=r'shopping_cart_exports/(?P<export_id>[0-9a-f]{64})')
+    def shopping_cart_export(self, request, export_id):
+        export_status = get_export_status(request.user.id, export_id)
+        if export_status is None:
+            raise Http404
+        return Response({'id': export_id, 'status': export_status})
 
-        return FileResponse(buf, as_attachment=True, filename='shop.pdf')
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path=r'shopping_cart_exports/(?P<export_id>[0-9a-f]{64})/download')
+    def download_shopping_cart_export(self, request, export_id):
+        if get_export_status(request.user.id, export_id) != DONE:
+            raise Http404
+        return FileResponse(
+            open(get_export_path(request.user.id, export_id), 'rb'),
+            as_attachment=True,
+            filename='shop.pdf'
+            )
 
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
@@ -138,10 +228,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, pk, *args, **kwargs):
-        kwargs['partial'] = True
         instance = self.get_object()
-        instance.id = pk
-        instance.save()
         data = request.data.copy()
         data['tags'] = [{'id': idx} for idx in data['tags']]
         serializer = RecipeSerializer(instance, data=data, partial=True)
@@ -150,21 +237,55 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
+    cache_version_name = 'ingredients'
     permission_classes = (IsAuthorOrAdmin,)
     pagination_class = None
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        # name входит в ключ кеша вместе с остальным адресом.
+        return self.cached_response(self.search, request, *args, **kwargs)
+
+    def search(self, request, *args, **kwargs):
+        # Без name (в том числе пустого из поля автодополнения) -
+        # первые INGREDIENT_SEARCH_LIMIT по алфавиту, а не весь каталог.
+        ingredients = ingredient_index.search(
+            request.query_params.get('name', ''),
+            settings.INGREDIENT_SEARCH_LIMIT
+            )
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
+    cache_version_name = 'tags'
     permission_classes = (IsAuthorOrAdmin,)
     pagination_class = None
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
+def create_once(model, message, **fields):
+    """
+    Один INSERT; повторную запись отсекает уникальное ограничение,
+    поэтому двойной клик не создаёт дубликат.
+    """
+    try:
+        with transaction.atomic():
+            return model.objects.create(**fields)
+    except IntegrityError:
+        raise ValidationError(message)
+
+
+def delete_or_404(model, **fields):
+    deleted, _ = model.objects.filter(**fields).delete()
+    if not deleted:
+        raise Http404
+
+
 class ShoppingCartViewSet(views.APIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = TagSerializer
@@ -172,21 +293,17 @@ class ShoppingCartViewSet(views.APIView):
 
     def get(self, request, recipe_id):
         item = get_object_or_404(Recipe, pk=recipe_id)
-        owner = self.request.user
-        serializer = ShoppingCartCreateSerializer(
-            data={'item': recipe_id, 'owner': owner.id}
+        shopcart = create_once(
+            ShoppingCart,
+            'Вы уже добавили в список покупок',
+            item=item,
+            owner=request.user
             )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(owner=self.request.user)
-        shopcart = get_object_or_404(ShoppingCart, item=item, owner=owner)
         serializer = ShoppingCartSerializer(shopcart)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
-        user = request.user
-        item = get_object_or_404(Recipe, pk=recipe_id)
-        follow = get_object_or_404(ShoppingCart, item=item, owner=user)
-        follow.delete()
+        delete_or_404(ShoppingCart, item_id=recipe_id, owner=request.user)
         return Response('Удалено', status=status.HTTP_204_NO_CONTENT)
 
 
@@ -197,29 +314,17 @@ class FavoriteViewSet(views.APIView):
 
     def get(self, request, recipe_id):
         fav_item = get_object_or_404(Recipe, pk=recipe_id)
-        fav_user = self.request.user
-        serializer = FavoriteCreateSerializer(
-            data={'fav_item': recipe_id, 'fav_user': fav_user.id}
-            )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(fav_user=self.request.user)
-        shopcart = get_object_or_404(
+        favorite = create_once(
             Favorite,
+            'Вы уже добавили в избранное',
             fav_item=fav_item,
-            fav_user=fav_user
+            fav_user=request.user
             )
-        serializer = FavoriteSerializer(shopcart)
+        serializer = FavoriteSerializer(favorite)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
-        fav_user = request.user
-        fav_item = get_object_or_404(Recipe, pk=recipe_id)
-        follow = get_object_or_404(
-            Favorite,
-            fav_item=fav_item,
-            fav_user=fav_user
-            )
-        follow.delete()
+        delete_or_404(Favorite, fav_item_id=recipe_id, fav_user=request.user)
         return Response('Удалено', status=status.HTTP_204_NO_CONTENT)
 
 
@@ -227,37 +332,57 @@ class SubscribeView(views.APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request, user_id):
-        user = self.request.user
         author = get_object_or_404(CustomUser, id=user_id)
-        serializer = FollowCreateSerializer(
-            data={'user': user.id, 'author': user_id}
-            )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(user=self.request.user)
-        follow = get_object_or_404(
+        follow = create_once(
             Follow,
-            user=user,
+            'Вы уже подписаны',
+            user=request.user,
             author=author
             )
-        serializer = FollowSerializer(follow)
+        serializer = FollowSerializer(follow, context={
+            'request': request,
+            'recipes_limit': get_recipes_limit(request),
+            })
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, user_id):
-        user = request.user
-        author = get_object_or_404(CustomUser, id=user_id)
-        follow = get_object_or_404(Follow, user=user, author=author)
-        follow.delete()
+        delete_or_404(Follow, author_id=user_id, user=request.user)
         return Response('Удалено', status=status.HTTP_204_NO_CONTENT)
 
 
-class SubscribeListViewSet(viewsets.ModelViewSet, PageNumberPagination):
+class SubscribeListViewSet(CursorPaginationMixin,
+                           viewsets.ModelViewSet,
+                           PageNumberPagination):
     permission_classes = (IsAuthorOrAdmin,)
     queryset = Follow.objects.all()
     serializer_class = FollowSerializer
 
     def list(self, request, *args, **kwargs):
         user = self.request.user
-        subscriptions = Follow.objects.filter(user=user)
+        subscriptions = Follow.objects.filter(
+            user=user
+            ).select_related('author')
         page = self.paginate_queryset(subscriptions)
-        serializer = FollowSerializer(page, many=True)
+        recipes_limit = get_recipes_limit(request)
+        context = self.get_serializer_context()
+        context.update({
+            'recipes_limit': recipes_limit,
+            'recipes': get_recipes_by_author(
+                [follow.author_id for follow in page],
+                recipes_limit
+                ),
+            })
+        serializer = FollowSerializer(page, many=True, context=context)
         return self.get_paginated_response(serializer.data)
+
+
+class MetricsView(views.APIView):
+    """
+    Метрики в формате Prometheus для суперпользователя
+    или с адресов METRICS_ALLOWED_IPS.
+    """
+    permission_classes = (IsSuperuser | IsMetricsScraper,)
+
+    def get(self, request):
+        content, content_type = render_metrics()
+        return HttpResponse(content, content_type=content_type)
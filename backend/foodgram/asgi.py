@@ -0,0 +1,11 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+django.setup(set_prefix=False)
+
+from foodgram.handlers import StreamingASGIHandler  # noqa: E402
+
+application = StreamingASGIHandler()
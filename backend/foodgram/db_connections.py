@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import record_connection
+
+
+class HealthCheckMixin:
+    """
+    Соединение, оставшееся с прошлых запросов (CONN_MAX_AGE) и простоявшее
+    дольше DB_CONN_HEALTH_CHECK_IDLE секунд, проверяется SELECT 1 перед
+    первым SQL: оборванное закрывается, и Django открывает новое, вместо
+    того чтобы запрос упал. Соединения под нагрузкой и ответы из кеша
+    без SQL не проверяются. Проверка идёт в потоке, который пользуется
+    соединением, поэтому верна и в ASGI.
+    """
+    last_used = None
+
+    def connect(self):
+        # Внутри connect() ensure_connection вызывается несколько раз
+        # (set_autocommit, init_connection_state): пока last_used - None,
+        # открываемое соединение не проверяется.
+        self.last_used = None
+        super().connect()
+        self.last_used = time.monotonic()
+
+    def ensure_connection(self):
+        if (
+            settings.DB_CONN_HEALTH_CHECKS
+            and self.connection is not None
+            # Вне autocommit SELECT 1 открыл бы транзакцию (например,
+            # когда Atomic при выходе возвращает autocommit).
+            and self.autocommit
+            and not self.in_atomic_block
+            and self.last_used is not None
+            and time.monotonic() - self.last_used
+            > settings.DB_CONN_HEALTH_CHECK_IDLE
+            and not self.is_usable()
+        ):
+            self.close()
+            record_connection(self.alias, 'discarded')
+        super().ensure_connection()
+        if self.last_used is not None:
+            self.last_used = time.monotonic()
+
+
+@receiver(connection_created)
+def count_opened_connection(sender, connection, **kwargs):
+    record_connection(connection.alias, 'opened')
+
+
+@receiver(request_started)
+def count_reused_connections(sender, **kwargs):
+    # В ASGI Django 3.0 отправляет request_started не из того потока,
+    # где выполняется view, и видит соединения другого потока: там
+    # счётчик приблизителен.
+    for connection in connections.all():
+        if connection.connection is not None:
+            record_connection(connection.alias, 'reused')
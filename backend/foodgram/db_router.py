@@ -0,0 +1,76 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+class RoutingState:
+    """
+    Состояние маршрутизации одного запроса. После первой записи
+    чтение до конца запроса идёт в основную базу.
+    """
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def start_request(use_replica):
+    state = RoutingState(use_replica)
+    return state, _state.set(state)
+
+
+def finish_request(token):
+    _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Чтение внутри блока идёт в основную базу. Нужен там, где прочитанное
+    попадает в общий кеш: отставшая реплика иначе закешировала бы старые
+    данные под новой версией.
+    """
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    use_replica = state.use_replica
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = use_replica
+
+
+class ReplicaRouter:
+    """
+    Чтение в безопасных запросах к API - в случайную реплику из
+    DATABASE_REPLICAS (решает ReplicaRoutingMiddleware), всё
+    остальное и все миграции - в default.
+    """
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is not None
+            and state.use_replica
+            and not state.wrote
+            and settings.DATABASE_REPLICAS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
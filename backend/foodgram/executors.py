@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+_executors = {}
+_lock = Lock()
+
+
+def get_executor(name, max_workers):
+    """
+    Именованный пул потоков, свой в каждом процессе gunicorn.
+    Создаётся при первом обращении, то есть уже после fork.
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix=name
+                    )
+                _executors[name] = executor
+    return executor
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+
+from .executors import get_executor
+
+STREAM_QUEUE_SIZE = 8
+
+_done = object()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django 3.0 перебирает StreamingHttpResponse прямо в цикле событий,
+    где обращаться к базе нельзя (SynchronousOnlyOperation), а чтение
+    файла блокирует все запросы воркера. Здесь потоковый ответ
+    перебирает поток из пула 'asgi-streaming', а куски передаются
+    в цикл через ограниченную очередь, поэтому память не растёт.
+    """
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_response_headers(response),
+            })
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def put(part):
+            asyncio.run_coroutine_threadsafe(queue.put(part), loop).result()
+
+        def produce():
+            try:
+                for part in response:
+                    put(part)
+                    if stopped.is_set():
+                        break
+            finally:
+                # close() отправляет request_finished в этом же потоке:
+                # close_old_connections закроет именно его соединение.
+                try:
+                    response.close()
+                finally:
+                    put(_done)
+
+        producer = loop.run_in_executor(
+            get_executor('asgi-streaming', settings.ASGI_STREAMING_WORKERS),
+            produce
+            )
+        try:
+            while True:
+                part = await queue.get()
+                if part is _done:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                        })
+        except BaseException:
+            # Клиент ушёл: освобождаем очередь, чтобы поток дошёл до конца.
+            stopped.set()
+            while not queue.empty():
+                queue.get_nowait()
+            raise
+        await producer
+        await send({'type': 'http.response.body'})
+
+    def get_response_headers(self, response):
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip()
+                ))
+        return headers
@@ -0,0 +1,87 @@
+import os
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+# Метрики пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR, если он
+# задан (см. gunicorn.conf.py), и складываются по всем воркерам при
+# выдаче /metrics.
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время ответа',
+    ['view', 'method', 'status'],
+    )
+DB_QUERIES = Histogram(
+    'foodgram_db_queries',
+    'Число SQL-запросов на ответ',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+    )
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds',
+    'Время SQL-запросов на ответ',
+    ['view'],
+    )
+RESPONSE_SIZE = Histogram(
+    'foodgram_response_size_bytes',
+    'Размер тела ответа',
+    ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, float('inf')),
+    )
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests',
+    'Обращения к кешу ответов и данных',
+    ['cache', 'result'],
+    )
+DB_CONNECTIONS = Counter(
+    'foodgram_db_connections',
+    'Соединения с базой: opened - открытые, reused - оставшиеся '
+    'с прошлого запроса, discarded - закрытые проверкой',
+    ['alias', 'state'],
+    )
+
+
+def record_cache(name, hit):
+    CACHE_REQUESTS.labels(name, 'hit' if hit else 'miss').inc()
+
+
+def record_connection(alias, state):
+    DB_CONNECTIONS.labels(alias, state).inc()
+
+
+def get_response_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def observe_request(view, request, response, duration, stats):
+    """
+    view - имя из get_view_name; неразобранные пути собираются под
+    'unresolved', чтобы 404 не плодили метки.
+    """
+    view = view or 'unresolved'
+    REQUEST_DURATION.labels(
+        view, request.method, response.status_code
+        ).observe(duration)
+    DB_QUERIES.labels(view).observe(stats.count)
+    DB_DURATION.labels(view).observe(stats.duration)
+    size = get_response_size(response)
+    if size is not None:
+        RESPONSE_SIZE.labels(view).observe(size)
+
+
+def render_metrics():
+    """
+    Текст в формате Prometheus и его content type.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
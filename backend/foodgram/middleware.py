@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .db_router import finish_request, start_request
+from .metrics import observe_request
+
+logger = logging.getLogger('foodgram.requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY = 'primary:{}'
+
+
+def get_view_name(request):
+    """
+    Имя view для логов и метрик: модуль.класс, а для ViewSet -
+    ещё и действие (api.views.RecipeViewSet.list).
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'cls', None) or getattr(
+        match.func, 'view_class', match.func
+        )
+    name = f'{view.__module__}.{view.__qualname__}'
+    actions = getattr(match.func, 'actions', None)
+    if actions and request.method.lower() in actions:
+        name = f'{name}.{actions[request.method.lower()]}'
+    return name
+
+
+class QueryStats:
+    """
+    execute_wrapper: считает запросы и время в базе. Текст SQL
+    с плейсхолдерами одинаков у повторяющихся запросов (N+1),
+    поэтому при fingerprints=True повторы считаются по нему.
+    """
+    def __init__(self, fingerprints=False):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter() if fingerprints else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if self.fingerprints is not None:
+                self.fingerprints[sql] += 1
+
+    def repeated(self, limit=5):
+        if self.fingerprints is None:
+            return []
+        return [
+            {'sql': sql[:300], 'count': count}
+            for sql, count in self.fingerprints.most_common(limit)
+            if count > 1
+            ]
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Добавляет Server-Timing с числом и временем SQL-запросов, пишет их
+    в метрики /metrics, а для доли запросов REQUEST_LOG_SAMPLE_RATE -
+    строку JSON в лог foodgram.requests с повторяющимися запросами.
+    Запросы, выполненные при отдаче StreamingHttpResponse, не учитываются.
+    """
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.REQUEST_LOG_SAMPLE_RATE
+        stats = QueryStats(fingerprints=sampled)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.1f};'
+            f'desc="{stats.count} queries", '
+            f'app;dur={duration * 1000:.1f}'
+            )
+        view = get_view_name(request)
+        observe_request(view, request, response, duration, stats)
+        if sampled:
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'db_queries': stats.count,
+                'db_ms': round(stats.duration * 1000, 1),
+                'repeated_queries': stats.repeated(),
+                }, ensure_ascii=False))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает ReplicaRouter читать из реплик в безопасных запросах
+    к /api/. Клиент, который что-то записал, ещё REPLICA_STICKY_SECONDS
+    читает из основной базы и видит свои изменения. Клиент узнаётся
+    по хешу заголовка Authorization: токен DRF проверяет позже.
+    """
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def get_sticky_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        return STICKY_KEY.format(
+            hashlib.sha256(authorization.encode()).hexdigest()
+            )
+
+    def __call__(self, request):
+        key = self.get_sticky_key(request)
+        use_replica = (
+            request.method in SAFE_METHODS
+            and request.path.startswith('/api/')
+            and not (key and cache.get(key))
+            )
+        state, token = start_request(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        if state.wrote and key:
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
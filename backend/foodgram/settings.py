@@ -37,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.RequestInstrumentationMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,12 +74,61 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # PostgreSQL с проверкой простоявших соединений
+        # (foodgram/db_connections.py).
+        'ENGINE': 'foodgram.backends.postgresql',
         'NAME': os.environ.get('POSTGRES_NAME'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Соединение живёт между запросами воркера столько секунд.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # За pgbouncer в режиме transaction именованные курсоры
+        # iterator() оказываются в чужих транзакциях.
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+            'DB_TRANSACTION_POOLER', 'false'
+            ).lower() == 'true',
+    }
+}
+
+# Проверять SELECT 1 соединения, простоявшие без запросов дольше
+# DB_CONN_HEALTH_CHECK_IDLE секунд, перед первым SQL.
+DB_CONN_HEALTH_CHECKS = os.environ.get(
+    'DB_CONN_HEALTH_CHECKS', 'true'
+    ).lower() == 'true'
+DB_CONN_HEALTH_CHECK_IDLE = float(
+    os.environ.get('DB_CONN_HEALTH_CHECK_IDLE', 5)
+    )
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host1:5432,host2. Остальные
+# параметры подключения берутся у default; в тестах реплики
+# смотрят в тестовую базу default.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica.partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает только из основной базы.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -124,6 +175,22 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media") 
 
+IMAGE_MAX_SIZE = 1280
+
+IMAGE_THUMBNAIL_SIZE = 320
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+EXPORTS_ROOT = os.path.join(BASE_DIR, 'exports')
+
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+
+# Сколько секунд хранятся статус сборки PDF и сам файл в EXPORTS_ROOT.
+EXPORT_TIMEOUT = 60 * 60
+
+# Потоки, перебирающие потоковые ответы в режиме ASGI (foodgram/asgi.py).
+ASGI_STREAMING_WORKERS = int(os.environ.get('ASGI_STREAMING_WORKERS', 4))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
@@ -138,6 +205,41 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 9
 }
 
+API_CACHE_TIMEOUT = 60 * 60
+
+INGREDIENT_SEARCH_LIMIT = 20
+
+# Server-Timing с числом и временем SQL-запросов на каждый ответ.
+REQUEST_INSTRUMENTATION = os.environ.get(
+    'REQUEST_INSTRUMENTATION', 'true'
+    ).lower() == 'true'
+# Доля запросов, попадающих в лог foodgram.requests; 0 - лог выключен.
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 0))
+
+# Адреса и подсети, с которых /metrics отдаётся без токена суперпользователя.
+METRICS_ALLOWED_IPS = [
+    network for network in os.environ.get(
+        'METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+        ).split(',') if network
+    ]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+
+# Воркеры пишут метрики в общий каталог, /metrics складывает их.
+# prometheus_client выбирает режим нескольких процессов при первом
+# импорте, поэтому переменная задаётся до любого импорта из него:
+# иначе воркеры, получившие модуль от мастера, файлов не пишут.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'foodgram-metrics')
+    )
+
+
+def check_cache(server):
+    """
+    Версии данных, ETag, статусы выгрузок и привязка клиента к основной
+    базе живут в кеше: у LocMemCache он свой в каждом воркере.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from django.conf import settings
+
+    backend = settings.CACHES['default']['BACKEND']
+    if server.cfg.workers > 1 and backend.endswith('.LocMemCache'):
+        raise RuntimeError(
+            f'{backend} не общий для {server.cfg.workers} воркеров: '
+            'задайте CACHE_BACKEND и CACHE_LOCATION (memcached)'
+            )
+
+
+def on_starting(server):
+    check_cache(server)
+    # Файлы прошлого запуска дали бы задвоенные счётчики.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
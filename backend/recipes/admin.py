@@ -1,8 +1,62 @@
 from django.contrib import admin
 
-from .models import Ingredient, Recipe, Tag
+from .models import Ingredient, IngredientAmount, Recipe, Tag, TagRecipe
 
-admin.site.register(Tag)
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Фильтр с полем ввода вместо списка всех значений:
+    на больших таблицах список не загружается в память.
+    """
+    template = 'admin/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Без вариантов Django не показывает фильтр.
+        return ((),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class AuthorFilter(InputFilter):
+    parameter_name = 'author'
+    title = 'автору (username или email)'
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        field = 'author__email' if '@' in value else 'author__username'
+        return queryset.filter(**{field: value})
+
+
+class TagAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'slug',
+        'color',
+        )
+    search_fields = (
+        'name',
+        'slug')
+
+
+class TagRecipeInline(admin.TabularInline):
+    model = TagRecipe
+    autocomplete_fields = ('tag',)
+    extra = 0
+
+
+class IngredientAmountInline(admin.TabularInline):
+    model = IngredientAmount
+    autocomplete_fields = ('ingredient',)
+    extra = 0
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -11,18 +65,21 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'recipe_favorite_count'
         )
+    list_select_related = ('author',)
     search_fields = (
-        'username',
-        'email')
+        '^name',)
     list_filter = (
-        'name',
-        'author',
+        AuthorFilter,
         'tags')
+    autocomplete_fields = ('author',)
+    inlines = (TagRecipeInline, IngredientAmountInline)
+    show_full_result_count = False
 
     def recipe_favorite_count(self, obj):
-        return obj.favorite_set.count()
+        return obj.favorites_count
 
     recipe_favorite_count.short_description = "Число добавлений в избранное"
+    recipe_favorite_count.admin_order_field = 'favorites_count'
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -30,9 +87,13 @@ class IngredientAdmin(admin.ModelAdmin):
         'name',
         'measurement_unit',
         )
+    search_fields = (
+        '^name',)
     list_filter = (
-        'name',)
+        'measurement_unit',)
+    show_full_result_count = False
 
 
+admin.site.register(Tag, TagAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
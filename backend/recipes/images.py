@@ -0,0 +1,129 @@
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+
+from foodgram.executors import get_executor
+
+from .models import Recipe
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+RESIZABLE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+VARIANTS_DIR = 'variants'
+
+# Вариант: (наибольшая сторона или None для исходного размера, формат).
+VARIANTS = {
+    'thumbnail': (settings.IMAGE_THUMBNAIL_SIZE, 'JPEG'),
+    'thumbnail_webp': (settings.IMAGE_THUMBNAIL_SIZE, 'WEBP'),
+    'webp': (None, 'WEBP'),
+}
+
+VARIANT_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+
+def replace_file(name, save):
+    """
+    Перезаписывает файл в хранилище через временный файл,
+    чтобы nginx никогда не отдал его наполовину записанным.
+    """
+    path = default_storage.path(name)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            save(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def resize_image(name):
+    with default_storage.open(name) as f:
+        image = Image.open(f)
+        image.load()
+    max_size = settings.IMAGE_MAX_SIZE
+    if (image.format not in RESIZABLE_FORMATS
+            or (image.width <= max_size and image.height <= max_size)):
+        return
+    image_format = image.format
+    image.thumbnail((max_size, max_size))
+    replace_file(name, lambda f: image.save(f, image_format))
+
+
+def get_variant_name(name, variant):
+    """
+    image/<hash>.png -> image/variants/<hash>_thumbnail.jpg
+    """
+    directory, file_name = os.path.split(name)
+    stem = os.path.splitext(file_name)[0]
+    extension = VARIANT_EXTENSIONS[VARIANTS[variant][1]]
+    return os.path.join(directory, VARIANTS_DIR, f'{stem}_{variant}.{extension}')
+
+
+def generate_variants(name, force=False):
+    with default_storage.open(name) as f:
+        image = Image.open(f)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    os.makedirs(
+        os.path.join(os.path.dirname(default_storage.path(name)), VARIANTS_DIR),
+        exist_ok=True
+        )
+    for variant, (size, image_format) in VARIANTS.items():
+        variant_name = get_variant_name(name, variant)
+        if not force and default_storage.exists(variant_name):
+            continue
+        variant_image = image.copy()
+        if size is not None:
+            variant_image.thumbnail((size, size))
+        if image_format == 'JPEG' and variant_image.mode != 'RGB':
+            variant_image = variant_image.convert('RGB')
+        replace_file(
+            variant_name,
+            lambda f: variant_image.save(f, image_format, quality=85)
+            )
+
+
+def record_variants(name):
+    """
+    Отмечает у рецептов с картинкой name, что все её копии созданы:
+    ImageVariantsField отдаёт ссылки по этой отметке, не обращаясь
+    к хранилищу.
+    """
+    Recipe.objects.filter(image=name).update(
+        image_variants=','.join(VARIANTS)
+        )
+
+
+def process_image(name):
+    try:
+        resize_image(name)
+        generate_variants(name)
+        record_variants(name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    else:
+        bump_version('recipes')
+    finally:
+        # Поток пула не завершает запрос: соединение закрываем сами.
+        connection.close()
+
+
+def schedule_image_processing(name):
+    """
+    Отправляет обработку картинки в пул после фиксации транзакции,
+    запрос не ждёт её завершения.
+    """
+    transaction.on_commit(lambda: get_executor(
+        'images',
+        settings.IMAGE_WORKERS
+        ).submit(process_image, name))
@@ -0,0 +1,187 @@
+import csv
+import json
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from users.models import CustomUser
+
+from .models import Ingredient, IngredientAmount, Recipe, Tag, TagRecipe
+from .versions import bump_version
+
+# Пробелы и запятые между элементами массива.
+SEPARATOR = re.compile(r'\s*,*\s*')
+
+
+def iter_json_array(file, read_size=64 * 1024):
+    """
+    Построчно отдаёт элементы JSON-массива, не загружая файл целиком.
+    Разобранное начало буфера отрезается только при чтении следующего
+    куска, а не после каждого элемента.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    for chunk in iter(lambda: file.read(read_size), ''):
+        buffer = chunk.lstrip()
+        if buffer:
+            break
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив')
+    pos = 1
+    eof = False
+    while True:
+        pos = SEPARATOR.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = len(buffer)
+        # Элемент, дошедший до конца буфера, мог оборваться на границе
+        # куска (например, число): дочитываем и разбираем заново.
+        if end == len(buffer) and not eof:
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+
+def iter_csv(file):
+    return csv.DictReader(file)
+
+
+def import_ingredients(rows):
+    """
+    Добавляет ингредиенты, которых ещё нет в базе.
+    Ключ - пара (name, measurement_unit), повторный запуск ничего не дублирует.
+    """
+    keys = {(row['name'], row['measurement_unit']) for row in rows}
+    existing = set(Ingredient.objects.filter(
+        name__in={name for name, _ in keys}
+        ).values_list('name', 'measurement_unit'))
+    new = keys - existing
+    Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit=measurement_unit)
+        for name, measurement_unit in new
+        )
+    return len(new), len(keys) - len(new)
+
+
+def import_tags(rows):
+    """
+    Добавляет новые теги и обновляет name/color существующих по slug.
+    """
+    tags = {row['slug']: row for row in rows}
+    existing = Tag.objects.in_bulk(tags, field_name='slug')
+    for slug, tag in existing.items():
+        tag.name = tags[slug]['name']
+        tag.color = tags[slug]['color']
+    Tag.objects.bulk_update(existing.values(), ['name', 'color'])
+    Tag.objects.bulk_create(
+        Tag(slug=slug, name=row['name'], color=row['color'])
+        for slug, row in tags.items() if slug not in existing
+        )
+    return len(tags) - len(existing), len(existing)
+
+
+def import_recipes(rows):
+    """
+    Добавляет рецепты вместе с тегами и ингредиентами.
+    Рецепт с тем же автором (email) и названием пропускается.
+    """
+    authors = CustomUser.objects.in_bulk(
+        {row['author'] for row in rows},
+        field_name='email'
+        )
+    tags = Tag.objects.in_bulk(
+        {slug for row in rows for slug in row.get('tags', ())},
+        field_name='slug'
+        )
+    ingredients = {
+        (ingredient.name, ingredient.measurement_unit): ingredient
+        for ingredient in Ingredient.objects.filter(name__in={
+            item['name']
+            for row in rows for item in row.get('ingredients', ())
+            })
+        }
+    existing = set(Recipe.objects.filter(
+        author__in=authors.values(),
+        name__in={row['name'] for row in rows}
+        ).values_list('author__email', 'name'))
+    new = {}
+    for row in rows:
+        key = (row['author'], row['name'])
+        if key in existing or key in new:
+            continue
+        if row['author'] not in authors:
+            raise ValueError(f'Автор {row["author"]} не найден')
+        new[key] = row
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=authors[row['author']],
+            name=row['name'],
+            text=row['text'],
+            cooking_time=row['cooking_time'],
+            image=row.get('image', ''),
+            )
+        for row in new.values()
+        )
+    recipes = {
+        (recipe.author.email, recipe.name): recipe
+        for recipe in Recipe.objects.filter(
+            author__in=authors.values(),
+            name__in={name for _, name in new}
+            ).select_related('author')
+        }
+    tag_recipes = []
+    amounts = []
+    for key, row in new.items():
+        recipe = recipes[key]
+        for slug in row.get('tags', ()):
+            tag_recipes.append(TagRecipe(tag=tags[slug], recipe=recipe))
+        for item in row.get('ingredients', ()):
+            amounts.append(IngredientAmount(
+                ingredient=ingredients[
+                    (item['name'], item['measurement_unit'])
+                    ],
+                recipe=recipe,
+                amount=item['amount']
+                ))
+    TagRecipe.objects.bulk_create(tag_recipes)
+    IngredientAmount.objects.bulk_create(amounts)
+    # bulk_create не отправляет сигналы, счётчики авторов обновляем сами.
+    for author, count in Counter(
+            authors[row['author']].id for row in new.values()).items():
+        CustomUser.objects.filter(pk=author).update(
+            recipes_count=F('recipes_count') + count
+            )
+    return len(new), len(rows) - len(new)
+
+
+IMPORTERS = {
+    'ingredients': import_ingredients,
+    'tags': import_tags,
+    'recipes': import_recipes,
+}
+
+# Страницы рецептов включают name и color тегов, поэтому обновлённые
+# теги устаревают и закешированные рецепты (как в signals.py).
+VERSIONS = {
+    'ingredients': ('ingredients',),
+    'tags': ('tags', 'recipes'),
+    'recipes': ('recipes',),
+}
+
+
+def import_chunk(model, rows):
+    with transaction.atomic():
+        for name in VERSIONS[model]:
+            bump_version(name)
+        return IMPORTERS[model](rows)
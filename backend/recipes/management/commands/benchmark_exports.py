@@ -0,0 +1,113 @@
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+
+from api import exports
+from recipes.models import ShoppingCart
+
+EXPORT_URL = '/api/recipes/download_shopping_cart/'
+STATUS_URL = '/api/recipes/shopping_cart_exports/{}/'
+
+
+class Command(BaseCommand):
+    help = (
+        "замеряет время ответа эндпоинта запущенного сервера без выгрузок "
+        "PDF и во время них"
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--path', default='/api/recipes/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--exporters',
+            type=int,
+            default=2,
+            help='сколько пользователей с самыми большими списками покупок '
+                 'непрерывно собирают PDF во время второго замера',
+            )
+
+    def handle(self, *args, **options):
+        owners = list(
+            ShoppingCart.objects.values('owner').annotate(
+                total=Count('id')
+                ).order_by('-total').values_list(
+                'owner',
+                flat=True
+                )[:options['exporters']]
+            )
+        if not owners:
+            raise CommandError('Нет списков покупок для выгрузки')
+        self.url = options['url'].rstrip('/')
+        self.measure('Без выгрузок PDF', options)
+        stop = threading.Event()
+        exported = []
+        threads = [
+            threading.Thread(target=self.export, args=(owner, stop, exported))
+            for owner in owners
+            ]
+        for thread in threads:
+            thread.start()
+        try:
+            self.measure('Во время выгрузок PDF', options)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(f'Собрано PDF: {len(exported)}')
+
+    def fetch(self, path, method='GET', token=None):
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        request = Request(self.url + path, method=method, headers=headers)
+        with urlopen(request) as response:
+            return response.read()
+
+    def measure(self, title, options):
+        def timed(_):
+            started = time.perf_counter()
+            self.fetch(options['path'])
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            timings = list(pool.map(timed, range(options['requests'])))
+        p99 = statistics.quantiles(timings, n=100)[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'{title}: медиана {statistics.median(timings):.2f} мс, '
+            f'p99 {p99:.2f} мс, максимум {max(timings):.2f} мс'
+            ))
+
+    def export(self, user_id, stop, exported):
+        """
+        Выгрузка через API, как у фронтенда. Готовый файл удаляется,
+        чтобы следующая выгрузка собирала PDF заново: команда должна
+        видеть EXPORTS_ROOT сервера.
+        """
+        try:
+            token, _ = Token.objects.get_or_create(user_id=user_id)
+        finally:
+            connection.close()
+        while True:
+            job = json.loads(self.fetch(EXPORT_URL, 'POST', token.key))
+            while job['status'] == exports.PENDING:
+                time.sleep(0.1)
+                job = json.loads(
+                    self.fetch(STATUS_URL.format(job['id']), token=token.key)
+                    )
+            if job['status'] != exports.DONE:
+                raise CommandError(f'Выгрузка {job["id"]}: {job["status"]}')
+            self.fetch(STATUS_URL.format(job['id']) + 'download/',
+                       token=token.key)
+            exported.append(job['id'])
+            os.remove(exports.get_export_path(user_id, job['id']))
+            if stop.is_set():
+                return
@@ -0,0 +1,139 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils.datastructures import MultiValueDict
+
+from api.filterset import RecipeFilter
+from api.services import get_shopping_list
+from api.views import RecipeViewSet
+from recipes.models import (Favorite, Follow, IngredientAmount, ShoppingCart,
+                            TagRecipe)
+from users.models import CustomUser
+
+# Индексы и ограничения, которые обслуживают проверяемые запросы.
+INDEXED_MODELS = (Favorite, ShoppingCart, Follow, IngredientAmount, TagRecipe)
+
+
+def get_queries(user):
+    """
+    Первая страница рецептов из queryset RecipeViewSet (с флагами
+    Exists и его порядком) после RecipeFilter, и список покупок
+    из get_shopping_list.
+    """
+    request = SimpleNamespace(user=user)
+    recipes = RecipeViewSet(
+        request=request,
+        format_kwarg=None,
+        action='list'
+        ).get_queryset()
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    tags = list(
+        TagRecipe.objects.values_list('tag__slug', flat=True).annotate(
+            total=Count('id')
+            ).order_by('-total')[:2]
+        )
+
+    def filtered(**params):
+        return RecipeFilter(
+            MultiValueDict(params),
+            queryset=recipes,
+            request=request
+            ).qs[:page_size]
+
+    return {
+        'tags': filtered(tags=tags),
+        'is_favorited': filtered(is_favorited=['true']),
+        'exists': recipes[:page_size],
+        'shopping_list': get_shopping_list(user),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "печатает EXPLAIN и время запросов фильтра по тегам, избранного, "
+        "флагов Exists и списка покупок"
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='email пользователя; по умолчанию - с самым большим '
+                 'избранным',
+            )
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument(
+            '--generate',
+            action='store_true',
+            help='сначала заполнить базу командой generate_fake_data',
+            )
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument(
+            '--without-indexes',
+            action='store_true',
+            help='повторить замеры без индексов и уникальных ограничений '
+                 'связующих таблиц (только PostgreSQL; таблицы блокируются '
+                 'до конца замеров, изменения откатываются)',
+            )
+
+    def handle(self, *args, **options):
+        if options['without_indexes'] and connection.vendor != 'postgresql':
+            raise CommandError(
+                'Замеры без индексов возможны только в PostgreSQL'
+                )
+        if options['generate']:
+            call_command(
+                'generate_fake_data',
+                users=options['users'],
+                recipes=options['recipes'],
+                stdout=self.stdout
+                )
+        user = self.get_user(options['user'])
+        self.stdout.write(f'Пользователь: {user.email}')
+        self.measure('С индексами', user, options['runs'])
+        if not options['without_indexes']:
+            return
+        with transaction.atomic():
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+                    for constraint in model._meta.constraints:
+                        editor.remove_constraint(model, constraint)
+            connection.cursor().execute('ANALYZE')
+            self.measure('Без индексов', user, options['runs'])
+            transaction.set_rollback(True)
+
+    def get_user(self, email):
+        if email:
+            user = CustomUser.objects.filter(email=email).first()
+        else:
+            top = Favorite.objects.values('fav_user').annotate(
+                total=Count('id')
+                ).order_by('-total').first()
+            user = top and CustomUser.objects.get(pk=top['fav_user'])
+        if user is None:
+            raise CommandError('Нет пользователя для замеров')
+        return user
+
+    def measure(self, title, user, runs):
+        options = {}
+        if connection.vendor == 'postgresql':
+            options = {'analyze': True, 'buffers': True}
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in get_queries(user).items():
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: медиана {statistics.median(timings):.2f} мс, '
+                f'максимум {max(timings):.2f} мс'
+                ))
+            self.stdout.write(queryset.explain(**options))
@@ -0,0 +1,261 @@
+import csv
+import io
+import random
+import time
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, Tag, TagRecipe)
+from recipes.versions import bump_version
+from users.models import CustomUser
+
+UNITS = ('г', 'мл', 'шт', 'ст. л.', 'по вкусу')
+
+
+def zipf_weights(count, skew):
+    """
+    Накопленные веса закона Ципфа: первый элемент популярнее элемента
+    с рангом i в (i + 1) ** skew раз. Ранги перемешаны вызывающим.
+    """
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+def heavy_tail(rand, mean, limit):
+    """
+    Размер выборки с тяжёлым хвостом (Парето, alpha=2) и заданным средним.
+    """
+    return min(limit, int(mean * rand.paretovariate(2) / 2))
+
+
+def pick(rand, population, cum_weights, k):
+    return set(rand.choices(population, cum_weights=cum_weights, k=k))
+
+
+def insert_rows(model, fields, rows, batch_size):
+    """
+    Пишет кортежи значений полей fields пачками: в PostgreSQL через COPY,
+    в остальных СУБД через bulk_create. Возвращает число строк.
+    """
+    rows = iter(rows)
+    total = 0
+    columns = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(field).column)
+        for field in fields
+        )
+    table = connection.ops.quote_name(model._meta.db_table)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        total += len(batch)
+        if connection.vendor != 'postgresql':
+            model.objects.bulk_create(
+                model(**dict(zip(fields, row))) for row in batch
+                )
+            continue
+        buf = io.StringIO()
+        # Строки в кавычках: пустая строка не превращается в NULL.
+        csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC).writerows(batch)
+        buf.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buf
+                )
+
+
+class Command(BaseCommand):
+    help = (
+        "генерирует синтетических пользователей, рецепты, подписки, "
+        "избранное и списки покупок с распределением Ципфа"
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='показатель Ципфа для авторов, рецептов и ингредиентов',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--password',
+            help='общий пароль; по умолчанию войти под пользователями нельзя',
+            )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        prefix = f'fake{options["seed"]}'
+        if CustomUser.objects.filter(
+                username__startswith=f'{prefix}_'
+                ).exists():
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже сгенерированы'
+                )
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        with transaction.atomic():
+            users = self.generate_users(
+                prefix, options['users'], options['password']
+                )
+            tags = self.insert(Tag, ('name', 'slug', 'color'), (
+                (f'{prefix} тег {i}', f'{prefix}-{i}', f'#{i:06x}')
+                for i in range(options['tags'])
+                ), slug__startswith=f'{prefix}-')
+            ingredients = self.insert(
+                Ingredient,
+                ('name', 'measurement_unit'),
+                (
+                    (f'{prefix} ингредиент {i}', rand.choice(UNITS))
+                    for i in range(options['ingredients'])
+                    ),
+                name__startswith=f'{prefix} '
+                )
+            # Один рейтинг авторов на всё: популярные авторы и пишут
+            # больше, и подписчиков у них больше.
+            authors = rand.sample(users, len(users))
+            recipes = self.generate_recipes(
+                rand, prefix, authors, options['recipes'], options['skew']
+                )
+            self.generate_recipe_links(
+                rand, recipes, tags, ingredients, options
+                )
+            self.generate_user_links(rand, authors, recipes, options)
+        for name in ('recipes', 'tags', 'ingredients'):
+            bump_version(name)
+        call_command('recalculate_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+            ))
+
+    def insert(self, model, fields, rows, **lookup):
+        """
+        Вставляет строки и, если задан lookup, возвращает id созданных
+        объектов: COPY их не возвращает.
+        """
+        started = time.monotonic()
+        count = insert_rows(model, fields, rows, self.batch_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model._meta.model_name}: {count} строк, '
+            f'{count / elapsed if elapsed else count:.0f} строк/с'
+            )
+        if lookup:
+            return list(model.objects.filter(**lookup).order_by(
+                'id'
+                ).values_list('id', flat=True))
+
+    def generate_users(self, prefix, count, password):
+        password = make_password(password)
+        now = timezone.now()
+        return self.insert(
+            CustomUser,
+            (
+                'username', 'email', 'first_name', 'last_name', 'password',
+                'is_superuser', 'is_staff', 'is_active', 'date_joined',
+                'recipes_count', 'followers_count',
+                ),
+            (
+                (
+                    f'{prefix}_{i}', f'{prefix}_{i}@example.com', 'Имя',
+                    'Фамилия', password, False, False, True, now, 0, 0,
+                    )
+                for i in range(count)
+                ),
+            username__startswith=f'{prefix}_'
+            )
+
+    def generate_recipes(self, rand, prefix, authors, count, skew):
+        """
+        Авторы выбираются по Ципфу: немногие пишут большую часть рецептов.
+        """
+        author_weights = zipf_weights(len(authors), skew)
+        return self.insert(
+            Recipe,
+            (
+                'author_id', 'name', 'image', 'text', 'cooking_time',
+                'favorites_count', 'shopping_carts_count', 'image_variants',
+                ),
+            (
+                (
+                    rand.choices(authors, cum_weights=author_weights)[0],
+                    f'{prefix} рецепт {i}', 'image/fake.png', 'Описание',
+                    rand.randint(1, 240), 0, 0, '',
+                    )
+                for i in range(count)
+                ),
+            name__startswith=f'{prefix} '
+            )
+
+    def generate_recipe_links(self, rand, recipes, tags, ingredients,
+                              options):
+        ingredients = rand.sample(ingredients, len(ingredients))
+        ingredient_weights = zipf_weights(len(ingredients), options['skew'])
+        self.insert(TagRecipe, ('recipe_id', 'tag_id'), (
+            (recipe, tag)
+            for recipe in recipes
+            for tag in rand.sample(
+                tags,
+                min(len(tags), rand.randint(1, options['tags_per_recipe']))
+                )
+            ))
+        fields = ('recipe_id', 'ingredient_id', 'amount')
+        self.insert(IngredientAmount, fields, (
+            (recipe, ingredient, rand.randint(1, 1000))
+            for recipe in recipes
+            for ingredient in pick(
+                rand, ingredients, ingredient_weights,
+                options['ingredients_per_recipe']
+                )
+            ))
+
+    def generate_user_links(self, rand, authors, recipes, options):
+        """
+        Подписки и избранное тяготеют к популярным авторам и рецептам,
+        а их число у пользователя распределено с тяжёлым хвостом.
+        """
+        skew = options['skew']
+        users = sorted(authors)
+        author_weights = zipf_weights(len(authors), skew)
+        popular = rand.sample(recipes, len(recipes))
+        recipe_weights = zipf_weights(len(popular), skew)
+        self.insert(Follow, ('user_id', 'author_id'), (
+            (user, author)
+            for user in users
+            for author in pick(
+                rand, authors, author_weights,
+                heavy_tail(rand, options['follows_per_user'], len(users))
+                )
+            if author != user
+            ))
+        self.insert(Favorite, ('fav_user_id', 'fav_item_id'), (
+            (user, recipe)
+            for user in users
+            for recipe in pick(
+                rand, popular, recipe_weights,
+                heavy_tail(rand, options['favorites_per_user'], len(recipes))
+                )
+            ))
+        self.insert(ShoppingCart, ('owner_id', 'item_id'), (
+            (user, recipe)
+            for user in users
+            for recipe in pick(
+                rand, popular, recipe_weights,
+                heavy_tail(rand, options['cart_per_user'], len(recipes))
+                )
+            ))
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+
+from recipes.images import generate_variants, record_variants
+from recipes.models import Recipe
+from recipes.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        "создаёт недостающие уменьшенные копии картинок рецептов "
+        "и отмечает их у рецептов"
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='пересоздать и уже существующие копии',
+            )
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.exclude(image='').order_by().values_list(
+            'image',
+            flat=True
+            ).distinct()
+
+        def generate(name):
+            try:
+                generate_variants(name, force=options['force'])
+            except Exception as error:
+                return name, error
+            return name, None
+
+        processed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for name, error in executor.map(generate, names.iterator()):
+                processed += 1
+                if error:
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    record_variants(name)
+        bump_version('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}'
+            ))
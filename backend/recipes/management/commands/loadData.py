@@ -1,24 +1,70 @@
-import json
 import os
+import resource
+import time
+from itertools import islice
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
-from recipes.models import Ingredient
+from recipes.importers import IMPORTERS, import_chunk, iter_csv, iter_json_array
 
 fixture_dir = ''
 fixture_filename = 'ingredients.json'
 
 
 class Command(BaseCommand):
-    help = "load data"
+    help = (
+        "load data: потоково загружает ингредиенты, теги или рецепты "
+        "из JSON-массива или CSV пачками; повторный запуск не создаёт дублей"
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(fixture_dir, fixture_filename),
+            )
+        parser.add_argument(
+            '--model',
+            choices=sorted(IMPORTERS),
+            default='ingredients',
+            )
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            help='по умолчанию определяется по расширению файла',
+            )
+        parser.add_argument('--chunk-size', type=int, default=1000)
 
     def handle(self, *args, **options):
-        fixture_file = os.path.join(fixture_dir, fixture_filename)
-        print(fixture_file)
-        f = open(fixture_file,)
-        my_json_obj = json.load(f)
-        for title in my_json_obj:
-            Ingredient.objects.create(
-                name = title['name'],
-                measurement_unit = title['measurement_unit']
-                )
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'json'
+            )
+        if file_format == 'csv' and options['model'] == 'recipes':
+            raise CommandError('Рецепты загружаются только из JSON')
+        self.stdout.write(path)
+        created = skipped = 0
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = iter_csv(f) if file_format == 'csv' else iter_json_array(f)
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                try:
+                    chunk_created, chunk_skipped = import_chunk(
+                        options['model'],
+                        chunk
+                        )
+                except (KeyError, ValueError) as error:
+                    raise CommandError(error)
+                created += chunk_created
+                skipped += chunk_skipped
+        elapsed = time.monotonic() - started
+        rows_count = created + skipped
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["model"]}: {created} добавлено, {skipped} уже было; '
+            f'{rows_count / elapsed if elapsed else rows_count:.0f} строк/с, '
+            f'пик памяти {peak_memory / 1024:.1f} MiB'
+            ))
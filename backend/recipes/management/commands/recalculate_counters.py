@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Follow, Recipe, ShoppingCart
+from users.models import CustomUser
+
+
+def count_of(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+                ).order_by().values(field).annotate(
+                total=Count('pk')
+                ).values('total'),
+            output_field=IntegerField()
+            ),
+        Value(0)
+        )
+
+
+class Command(BaseCommand):
+    help = "пересчитывает счётчики избранного, списков покупок, рецептов и подписчиков"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipes = Recipe.objects.update(
+                favorites_count=count_of(Favorite, 'fav_item'),
+                shopping_carts_count=count_of(ShoppingCart, 'item'),
+                )
+            users = CustomUser.objects.update(
+                recipes_count=count_of(Recipe, 'author'),
+                followers_count=count_of(Follow, 'author'),
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: рецептов {recipes}, пользователей {users}'
+            ))
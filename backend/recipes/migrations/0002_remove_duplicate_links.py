@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import Min
+
+# Пары, которые станут уникальными в 0003: из повторов остаётся
+# самая ранняя строка.
+LINKS = (
+    ('Favorite', ('fav_user', 'fav_item')),
+    ('ShoppingCart', ('owner', 'item')),
+    ('Follow', ('user', 'author')),
+)
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name, fields in LINKS:
+        model = apps.get_model('recipes', model_name)
+        first = model.objects.order_by().values(*fields).annotate(
+            first=Min('id')
+            ).values('first')
+        model.objects.exclude(id__in=first).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_remove_duplicate_links'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientamount',
+            index=models.Index(fields=['recipe', 'ingredient'], name='ingredientamount_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagrecipe',
+            index=models.Index(fields=['tag', 'recipe'], name='tagrecipe_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('fav_user', 'fav_item'), name='unique_favorite'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('owner', 'item'), name='unique_shopping_cart'),
+        ),
+    ]
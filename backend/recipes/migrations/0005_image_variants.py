@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Названия вариантов из recipes.images.VARIANTS через запятую', max_length=200, verbose_name='Созданные копии картинки'),
+        ),
+    ]
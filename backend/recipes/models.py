@@ -82,6 +82,14 @@ class Recipe(models.Model):
         null=False,
         verbose_name='Картинка рецепта',
     )
+    image_variants = models.CharField(
+        verbose_name='Созданные копии картинки',
+        max_length=200,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Названия вариантов из recipes.images.VARIANTS через запятую',
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         blank=False,
@@ -92,6 +100,16 @@ class Recipe(models.Model):
         blank=False,
         help_text='Укажите Время приготовления в минутах',
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Число добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        verbose_name='Число добавлений в список покупок',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт',
@@ -121,6 +139,12 @@ class IngredientAmount(models.Model):
         verbose_name = 'Количество игредиентов',
         verbose_name_plural = 'Количества игредиентов'
         ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='ingredientamount_recipe_idx'
+            ),
+        ]
 
 
 class TagRecipe(models.Model):
@@ -141,6 +165,9 @@ class TagRecipe(models.Model):
         verbose_name = 'Теги в рецепте',
         verbose_name_plural = 'Теги в рецептах'
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['tag', 'recipe'], name='tagrecipe_tag_idx'),
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -161,6 +188,12 @@ class ShoppingCart(models.Model):
         verbose_name = 'Список покупок',
         verbose_name_plural = 'Списки покупок'
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'item'],
+                name='unique_shopping_cart'
+            ),
+        ]
 
 
 class Favorite(models.Model):
@@ -181,6 +214,12 @@ class Favorite(models.Model):
         verbose_name = 'Избранное',
         verbose_name_plural = 'Избранные'
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fav_user', 'fav_item'],
+                name='unique_favorite'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -201,3 +240,9 @@ class Follow(models.Model):
         verbose_name = 'Подписка',
         verbose_name_plural = 'Подписки'
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
@@ -0,0 +1,64 @@
+from bisect import bisect_left
+from threading import Lock
+
+from foodgram.db_router import use_primary
+
+from .models import Ingredient
+from .versions import get_version
+
+
+class IngredientIndex:
+    """
+    Отсортированный индекс ингредиентов в памяти процесса для автодополнения.
+    Пересобирается, когда меняется версия 'ingredients'.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.keys = []
+        self.ingredients = []
+        self.lock = Lock()
+
+    def refresh(self):
+        version = get_version('ingredients')
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            with use_primary():
+                ingredients = sorted(
+                    Ingredient.objects.all(),
+                    key=lambda ingredient: (
+                        ingredient.name.lower(), ingredient.id
+                        )
+                    )
+            self.keys, self.ingredients, self.version = (
+                [ingredient.name.lower() for ingredient in ingredients],
+                ingredients,
+                version,
+                )
+
+    def search(self, name, limit):
+        """
+        Сначала ингредиенты, название которых начинается с name,
+        затем содержащие name; без учёта регистра, не больше limit штук.
+        """
+        self.refresh()
+        keys, ingredients = self.keys, self.ingredients
+        name = name.lower()
+        found = []
+        position = bisect_left(keys, name)
+        while (position < len(keys) and len(found) < limit
+               and keys[position].startswith(name)):
+            found.append(ingredients[position])
+            position += 1
+        for key, ingredient in zip(keys, ingredients):
+            if len(found) >= limit:
+                break
+            if name in key and not key.startswith(name):
+                found.append(ingredient)
+        return found
+
+
+ingredient_index = IngredientIndex()
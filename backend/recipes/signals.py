@@ -0,0 +1,103 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import CustomUser
+
+from .models import (Favorite, Follow, Ingredient, IngredientAmount, Recipe,
+                     ShoppingCart, Tag, TagRecipe)
+from .versions import bump_version
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    bump_version('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    bump_version('tags')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=TagRecipe)
+@receiver((post_save, post_delete), sender=IngredientAmount)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def recipes_changed(sender, **kwargs):
+    bump_version('recipes')
+
+
+@receiver((post_save, post_delete), sender=CustomUser)
+def author_changed(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_version('recipes')
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    bump_version(f'user:{instance.fav_user_id}')
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    bump_version(f'user:{instance.owner_id}')
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    bump_version(f'user:{instance.user_id}')
+
+
+def update_counter(model, pk, field, delta):
+    # Счётчик строк, созданных до появления счётчиков, равен 0, пока
+    # не отработал recalculate_counters: в минус он уйти не должен.
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+        )
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, instance.fav_item_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    update_counter(Recipe, instance.fav_item_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(sender, instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, instance.item_id, 'shopping_carts_count', 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, **kwargs):
+    update_counter(Recipe, instance.item_id, 'shopping_carts_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        update_counter(CustomUser, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    update_counter(CustomUser, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        update_counter(CustomUser, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    update_counter(CustomUser, instance.author_id, 'followers_count', -1)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    """
+    Версия набора данных: время последнего изменения в миллисекундах.
+    Хранится в общем кеше, поэтому видна всем процессам gunicorn.
+    """
+    version = cache.get(VERSION_KEY.format(name))
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(VERSION_KEY.format(name), version, None):
+            version = cache.get(VERSION_KEY.format(name), version)
+    return version
+
+
+def bump_version(name):
+    """
+    Меняет версию после фиксации транзакции, чтобы никто не закешировал
+    под новой версией ещё не записанные данные.
+    """
+    def bump():
+        # incr атомарен: одновременные изменения не перезапишут друг друга,
+        # и версия только растёт. После простоя она догоняет текущее
+        # время (одновременные догоняния могут увести её вперёд часов).
+        version = get_version(name)
+        delta = max(1, int(time.time() * 1000) - version)
+        try:
+            cache.incr(VERSION_KEY.format(name), delta)
+        except ValueError:
+            # Ключ вытеснен из кеша: подойдёт любая новая версия.
+            get_version(name)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import exports
+from foodgram import executors
+from recipes.models import Ingredient, IngredientAmount, Recipe, ShoppingCart
+from users.models import CustomUser
+
+EXPORT_STATUS_URL = '/api/recipes/shopping_cart_exports/{}/'
+
+
+@pytest.fixture(autouse=True)
+def storage(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.EXPORTS_ROOT = str(tmp_path / 'exports')
+    yield
+    # Незаконченная сборка PDF иначе допишет файл в каталог
+    # следующего теста.
+    executor = executors._executors.pop('exports', None)
+    if executor is not None:
+        executor.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # В кеше лежат версии данных и ответы: тесты не должны их делить.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def create_user(number):
+    return CustomUser.objects.create_user(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password',
+        )
+
+
+def fill_cart(user, size):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(10)
+        )
+    ingredients = list(Ingredient.objects.order_by('id'))
+    for number in range(size):
+        recipe = Recipe.objects.create(
+            author=user,
+            name=f'Рецепт {number}',
+            image='image/recipe.png',
+            text='Описание',
+            cooking_time=10,
+            )
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(ingredient=ingredient, recipe=recipe, amount=5)
+            for ingredient in ingredients
+            )
+        ShoppingCart.objects.create(owner=user, item=recipe)
+
+
+def get_client(user):
+    token, _ = Token.objects.get_or_create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client
+
+
+def wait_for_export(client, export_id):
+    for _ in range(100):
+        response = client.get(EXPORT_STATUS_URL.format(export_id))
+        if response.json()['status'] != exports.PENDING:
+            return response.json()['status']
+        time.sleep(0.05)
+    pytest.fail('Сборка PDF не закончилась')
+
+
+@pytest.fixture
+def user(db):
+    return create_user(0)
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
@@ -0,0 +1,18 @@
+from foodgram.settings import *  # noqa
+
+# Реплика в тестах смотрит в тестовую базу default. Маршрутизация
+# включается только в тестах реплик: в обычных тестах данные живут
+# в незавершённой транзакции, которую второе соединение не видит.
+DATABASES = {
+    'default': DATABASES['default'],
+    'replica': {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}},
+}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,26 @@
+import io
+import re
+
+import pytest
+from django.core.management import call_command
+
+from .conftest import create_user, fill_cart
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_exports_measures_both_phases(live_server):
+    fill_cart(create_user(0), 3)
+    out = io.StringIO()
+    call_command(
+        'benchmark_exports',
+        url=live_server.url,
+        path='/api/tags/',
+        requests=10,
+        concurrency=2,
+        exporters=1,
+        stdout=out
+        )
+    output = out.getvalue()
+    for title in ('Без выгрузок PDF', 'Во время выгрузок PDF'):
+        assert f'{title}: медиана' in output
+    assert int(re.search(r'Собрано PDF: (\d+)', output).group(1)) >= 1
@@ -0,0 +1,20 @@
+from recipes.models import Favorite, Recipe
+
+from .conftest import create_user
+
+
+def test_delete_does_not_push_stale_counter_below_zero(user, user_client):
+    recipe = Recipe.objects.create(
+        author=create_user(1),
+        name='Рецепт',
+        image='image/recipe.png',
+        text='Описание',
+        cooking_time=10,
+        )
+    Favorite.objects.create(fav_user=user, fav_item=recipe)
+    # Строка избранного старше счётчика: recalculate_counters не запускали.
+    Recipe.objects.filter(pk=recipe.pk).update(favorites_count=0)
+    response = user_client.delete(f'/api/recipes/{recipe.id}/favorite/')
+    assert response.status_code == 204
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
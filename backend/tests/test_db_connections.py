@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from django.db import connections
+
+from foodgram.db_connections import HealthCheckMixin
+from recipes.models import Tag
+
+pytestmark = pytest.mark.skipif(
+    not isinstance(connections['default'], HealthCheckMixin),
+    reason='backend без проверки соединений'
+    )
+
+
+def test_idle_connection_is_checked_before_use(
+        transactional_db, settings, monkeypatch):
+    settings.DB_CONN_HEALTH_CHECK_IDLE = 0
+    connection = connections['default']
+    list(Tag.objects.all())
+    broken = connection.connection
+    monkeypatch.setattr(type(connection), 'is_usable', lambda self: False)
+    time.sleep(0.01)
+    list(Tag.objects.all())
+    assert connection.connection is not broken
+
+
+def test_busy_connection_is_not_checked(
+        transactional_db, settings, monkeypatch):
+    def is_usable(self):
+        raise AssertionError('лишний SELECT 1')
+
+    settings.DB_CONN_HEALTH_CHECK_IDLE = 60
+    connection = connections['default']
+    list(Tag.objects.all())
+    monkeypatch.setattr(type(connection), 'is_usable', is_usable)
+    list(Tag.objects.all())
+
+
+def test_new_connection_is_not_checked(
+        transactional_db, settings, monkeypatch):
+    def is_usable(self):
+        raise AssertionError('лишний SELECT 1')
+
+    settings.DB_CONN_HEALTH_CHECK_IDLE = 0
+    connection = connections['default']
+    connection.close()
+    monkeypatch.setattr(type(connection), 'is_usable', is_usable)
+    list(Tag.objects.all())
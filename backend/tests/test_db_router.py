@@ -0,0 +1,65 @@
+import time
+
+import pytest
+from django.db import connections, router
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+from .conftest import create_user, get_client
+
+pytestmark = pytest.mark.django_db(
+    transaction=True,
+    databases=['default', 'replica']
+    )
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.REPLICA_STICKY_SECONDS = 1
+
+
+def count_queries(client, method, url):
+    """
+    Число запросов к основной базе и к реплике.
+    """
+    with CaptureQueriesContext(connections['default']) as primary:
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(url)
+    assert response.status_code < 400, response.content
+    return len(primary), len(replica)
+
+
+def test_safe_read_uses_replica(replica):
+    client = get_client(create_user(0))
+    primary, replica = count_queries(client, 'get', '/api/users/me/')
+    assert primary == 0
+    assert replica > 0
+
+
+def test_write_sticks_client_to_primary(replica):
+    client = get_client(create_user(0))
+    recipe = Recipe.objects.create(
+        author=create_user(1),
+        name='Рецепт',
+        image='image/recipe.png',
+        text='Описание',
+        cooking_time=10,
+        )
+    count_queries(client, 'get', f'/api/recipes/{recipe.id}/favorite/')
+    primary, replica = count_queries(client, 'get', '/api/users/me/')
+    assert primary > 0
+    assert replica == 0
+    # Другой клиент по-прежнему читает из реплики.
+    other = get_client(create_user(2))
+    assert count_queries(other, 'get', '/api/users/me/')[0] == 0
+    time.sleep(1.1)
+    primary, replica = count_queries(client, 'get', '/api/users/me/')
+    assert primary == 0
+    assert replica > 0
+
+
+def test_migrations_only_on_default():
+    assert router.allow_migrate_model('default', Recipe)
+    assert not router.allow_migrate_model('replica', Recipe)
@@ -0,0 +1,24 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def test_explain_queries_prints_plans(db):
+    out = io.StringIO()
+    call_command(
+        'explain_queries',
+        generate=True,
+        users=20,
+        recipes=50,
+        runs=2,
+        stdout=out
+        )
+    output = out.getvalue()
+    for name in ('tags', 'is_favorited', 'exists', 'shopping_list'):
+        assert f'{name}: медиана' in output
+
+
+def test_explain_queries_needs_user(db):
+    with pytest.raises(CommandError):
+        call_command('explain_queries', runs=1, stdout=io.StringIO())
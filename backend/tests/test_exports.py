@@ -0,0 +1,69 @@
+import os
+import time
+
+from api import exports
+
+from .conftest import (EXPORT_STATUS_URL, create_user, get_client,
+                       wait_for_export)
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+def test_export_is_visible_only_to_owner(user_client):
+    export_id = user_client.post(URL).json()['id']
+    assert wait_for_export(user_client, export_id) == exports.DONE
+    assert user_client.get(
+        EXPORT_STATUS_URL.format(export_id) + 'download/'
+        ).status_code == 200
+    # Пустой список покупок даёт тот же id, но не доступ к чужому файлу.
+    other = get_client(create_user(1))
+    assert other.get(EXPORT_STATUS_URL.format(export_id)).status_code == 404
+    assert other.get(
+        EXPORT_STATUS_URL.format(export_id) + 'download/'
+        ).status_code == 404
+
+
+def test_get_starts_export_until_file_is_ready(user_client):
+    response = user_client.get(URL)
+    assert response.status_code == 202
+    export_id = response.json()['id']
+    assert wait_for_export(user_client, export_id) == exports.DONE
+    response = user_client.get(URL)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content).startswith(b'%PDF')
+
+
+def test_failed_export_can_be_retried(user_client, monkeypatch):
+    def fail(rows, buf):
+        raise ValueError
+
+    write_pdf = exports.write_shopping_list_pdf
+    monkeypatch.setattr(exports, 'write_shopping_list_pdf', fail)
+    export_id = user_client.post(URL).json()['id']
+    assert wait_for_export(user_client, export_id) == exports.FAILED
+    monkeypatch.setattr(exports, 'write_shopping_list_pdf', write_pdf)
+    assert user_client.post(URL).json()['id'] == export_id
+    assert wait_for_export(user_client, export_id) == exports.DONE
+
+
+def test_expired_exports_are_removed(settings):
+    os.makedirs(settings.EXPORTS_ROOT)
+    expired = exports.get_export_path(1, 'a' * 64)
+    fresh = exports.get_export_path(1, 'b' * 64)
+    for path in (expired, fresh):
+        open(path, 'wb').close()
+    old = time.time() - settings.EXPORT_TIMEOUT - 1
+    os.utime(expired, (old, old))
+    assert exports.get_export_status(1, 'a' * 64) is None
+    exports.remove_expired_exports()
+    assert not os.path.exists(expired)
+    assert os.path.exists(fresh)
+
+
+def test_removed_file_is_rendered_again(user, user_client):
+    export_id = user_client.post(URL).json()['id']
+    assert wait_for_export(user_client, export_id) == exports.DONE
+    os.remove(exports.get_export_path(user.id, export_id))
+    assert user_client.post(URL).json()['id'] == export_id
+    assert wait_for_export(user_client, export_id) == exports.DONE
+    assert os.path.exists(exports.get_export_path(user.id, export_id))
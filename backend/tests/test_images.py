@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipes.images import VARIANTS, get_variant_name, process_image
+from recipes.models import Recipe
+
+from .conftest import get_client
+
+
+@pytest.fixture
+def image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 40), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def recipe(user, image):
+    # Имя, под которым RecipeImageField сохранил бы эту картинку.
+    name = default_storage.save(
+        f'image/{hashlib.sha256(image).hexdigest()}.png',
+        ContentFile(image)
+        )
+    return Recipe.objects.create(
+        author=user,
+        name='Рецепт',
+        image=name,
+        text='Описание',
+        cooking_time=10,
+        )
+
+
+def get_variants(client):
+    return client.get('/api/recipes/').json()['results'][0]['image_variants']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_variants_are_recorded_after_processing(client, recipe, monkeypatch):
+    def exists(name):
+        raise AssertionError(f'Проверка {name} в хранилище')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(default_storage, 'exists', exists)
+        variants = get_variants(client)
+    assert all(url.endswith(recipe.image.name) for url in variants.values())
+
+    process_image(recipe.image.name)
+    recipe.refresh_from_db()
+    assert recipe.image_variants.split(',') == list(VARIANTS)
+
+    monkeypatch.setattr(default_storage, 'exists', exists)
+    variants = get_variants(client)
+    for variant in VARIANTS:
+        name = get_variant_name(recipe.image.name, variant)
+        assert variants[variant].endswith(name)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_uploaded_again_image_reuses_variants(user, recipe, image):
+    process_image(recipe.image.name)
+    response = get_client(user).post('/api/recipes/', {
+        'tags': [],
+        'ingredients': [],
+        'name': 'Ещё рецепт',
+        'image': 'data:image/png;base64,' + base64.b64encode(image).decode(),
+        'text': 'Описание',
+        'cooking_time': 5,
+        }, format='json')
+    assert response.status_code == 201, response.content
+    copy = Recipe.objects.get(pk=response.json()['id'])
+    assert copy.image.name == recipe.image.name
+    assert copy.image_variants == ','.join(VARIANTS)
@@ -0,0 +1,39 @@
+import io
+import json
+
+import pytest
+
+from recipes.importers import import_chunk, iter_json_array
+from recipes.models import Tag
+from recipes.versions import get_version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_tag_import_invalidates_recipes():
+    Tag.objects.create(name='Завтрак', color='#ffffff', slug='breakfast')
+    versions = get_version('tags'), get_version('recipes')
+    import_chunk('tags', [
+        {'slug': 'breakfast', 'name': 'Утро', 'color': '#000000'}
+        ])
+    assert get_version('tags') > versions[0]
+    assert get_version('recipes') > versions[1]
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 7, 64 * 1024])
+def test_iter_json_array_across_chunks(read_size):
+    items = [
+        {'name': 'соль', 'measurement_unit': 'г'},
+        12345,
+        'строка, с ] и [',
+        [1, 2.5, None],
+        ]
+    content = ' [ ' + ' , '.join(json.dumps(item) for item in items) + ' ] '
+    assert list(
+        iter_json_array(io.StringIO(content), read_size)
+        ) == items
+
+
+@pytest.mark.parametrize('content', ['{}', '[1, 2', '[1, }]'])
+def test_iter_json_array_rejects_broken_input(content):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(content), 2))
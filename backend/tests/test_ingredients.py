@@ -0,0 +1,45 @@
+from recipes.models import Ingredient
+
+
+def test_list_without_name_is_limited(user_client, settings):
+    settings.INGREDIENT_SEARCH_LIMIT = 5
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i:02}', measurement_unit='г')
+        for i in range(30)
+        )
+    for query in ({}, {'name': ''}):
+        response = user_client.get('/api/ingredients/', query)
+        assert response.status_code == 200
+        assert [item['name'] for item in response.json()] == [
+            f'ингредиент {i:02}' for i in range(5)
+            ]
+
+
+def test_search_is_cached_with_name(user_client, django_assert_num_queries):
+    Ingredient.objects.bulk_create([
+        Ingredient(name='мука', measurement_unit='г'),
+        Ingredient(name='молоко', measurement_unit='мл'),
+        ])
+    response = user_client.get('/api/ingredients/', {'name': 'мук'})
+    assert [item['name'] for item in response.json()] == ['мука']
+
+    with django_assert_num_queries(0):
+        cached = user_client.get('/api/ingredients/', {'name': 'мук'})
+    assert cached.json() == response.json()
+    assert cached['ETag'] == response['ETag']
+    other = user_client.get('/api/ingredients/', {'name': 'мол'})
+    assert [item['name'] for item in other.json()] == ['молоко']
+
+
+def test_search_not_modified(user_client):
+    response = user_client.get('/api/ingredients/', {'name': 'мук'})
+    assert response.status_code == 200
+    assert response.has_header('Last-Modified')
+
+    not_modified = user_client.get(
+        '/api/ingredients/',
+        {'name': 'мук'},
+        HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    assert not_modified.status_code == 304
+    assert not_modified['ETag'] == response['ETag']
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+# Мастер gunicorn читает конфиг, воркер получает от него модули и пишет
+# метрики; запускается без PROMETHEUS_MULTIPROC_DIR, как в контейнере
+# без этой переменной.
+WORKER = """
+import os
+import runpy
+
+config = runpy.run_path('gunicorn.conf.py')
+os.makedirs(config['metrics_dir'], exist_ok=True)
+if os.fork() == 0:
+    from foodgram.metrics import record_cache
+
+    record_cache('test', True)
+    os._exit(0)
+os.wait()
+print(config['metrics_dir'])
+"""
+
+
+@pytest.mark.django_db
+def test_worker_metrics_reach_endpoint(client, monkeypatch, tmp_path):
+    env = {
+        key: value for key, value in os.environ.items()
+        if key.upper() != 'PROMETHEUS_MULTIPROC_DIR'
+        }
+    env['TMPDIR'] = str(tmp_path)
+    metrics_dir = subprocess.run(
+        [sys.executable, '-c', WORKER],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+        ).stdout.strip()
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', metrics_dir)
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert (
+        'foodgram_cache_requests_total{cache="test",result="hit"} 1.0'
+        in response.content.decode()
+        )
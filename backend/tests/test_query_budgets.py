@@ -0,0 +1,147 @@
+import io
+import random
+import re
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.query_budgets import QUERY_BUDGETS
+from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, Tag, TagRecipe)
+from users.models import CustomUser
+
+from .conftest import get_client
+
+USERS = 50
+TAGS = 8
+INGREDIENTS = 300
+RECIPES_PER_USER = 4
+INGREDIENTS_PER_RECIPE = 8
+TAGS_PER_RECIPE = 2
+FOLLOWS_PER_USER = 10
+FAVORITES_PER_USER = 20
+SHOPPING_CART_PER_USER = 10
+
+# BEGIN/SAVEPOINT по-разному выглядят в разных СУБД и в бюджет не входят.
+TRANSACTION_SQL = re.compile(
+    r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b',
+    re.IGNORECASE
+    )
+
+
+@pytest.fixture
+def budget_data(db, settings):
+    """
+    Данные, на которых N+1 заметен: у каждого рецепта несколько тегов
+    и ингредиентов, у пользователя - подписки, избранное и список покупок.
+    Возвращает клиент зрителя и подстановки для url из QUERY_BUDGETS.
+    """
+    settings.DATABASE_REPLICAS = []
+    rand = random.Random(0)
+    password = make_password('password')
+    # bulk_create проставляет id не во всех СУБД,
+    # поэтому созданные строки перечитываются.
+    CustomUser.objects.bulk_create(
+        CustomUser(
+            email=f'user{i}@example.com',
+            username=f'user{i}',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password,
+            )
+        for i in range(USERS)
+        )
+    users = list(CustomUser.objects.order_by('id'))
+    Tag.objects.bulk_create(
+        Tag(name=f'Тег {i}', color=f'#{i:06x}', slug=f'tag{i}')
+        for i in range(TAGS)
+        )
+    tags = list(Tag.objects.order_by('id'))
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'салат {i}', measurement_unit='г')
+        for i in range(INGREDIENTS)
+        )
+    ingredients = list(Ingredient.objects.order_by('id'))
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f'Рецепт {author.username} {i}',
+            image='image/recipe.png',
+            text='Описание',
+            cooking_time=rand.randint(1, 120),
+            )
+        for author in users for i in range(RECIPES_PER_USER)
+        )
+    recipes = list(Recipe.objects.order_by('id'))
+    TagRecipe.objects.bulk_create(
+        TagRecipe(tag=tag, recipe=recipe)
+        for recipe in recipes
+        for tag in rand.sample(tags, TAGS_PER_RECIPE)
+        )
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(
+            ingredient=ingredient,
+            recipe=recipe,
+            amount=rand.randint(1, 500)
+            )
+        for recipe in recipes
+        for ingredient in rand.sample(ingredients, INGREDIENTS_PER_RECIPE)
+        )
+    # Автор последнего рецепта ни у кого не в подписках, а сам рецепт
+    # ни у кого не в избранном и не в списке покупок.
+    viewer, author, recipe = users[0], users[-1], recipes[-1]
+    others = users[1:-1]
+    Follow.objects.bulk_create(
+        Follow(user=user, author=followed)
+        for user in users[:-1]
+        for followed in rand.sample(others, FOLLOWS_PER_USER)
+        if followed != user
+        )
+    liked, pool = recipes[0], recipes[1:-1]
+    Favorite.objects.bulk_create(
+        Favorite(fav_user=user, fav_item=item)
+        for user in users
+        for item in rand.sample(pool, FAVORITES_PER_USER)
+        )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(owner=user, item=item)
+        for user in users
+        for item in rand.sample(pool, SHOPPING_CART_PER_USER)
+        )
+    Favorite.objects.create(fav_user=viewer, fav_item=liked)
+    ShoppingCart.objects.create(owner=viewer, item=liked)
+    followed = Follow.objects.filter(user=viewer).first().author
+    call_command('recalculate_counters', stdout=io.StringIO())
+    return get_client(viewer), {
+        'recipe': recipe.id,
+        'liked': liked.id,
+        'author': author.id,
+        'followed': followed.id,
+        }
+
+
+@pytest.mark.parametrize(
+    'method, url, budget',
+    [budget[1:] for budget in QUERY_BUDGETS],
+    ids=[budget[0] for budget in QUERY_BUDGETS]
+    )
+def test_query_budget(budget_data, method, url, budget):
+    client, urls = budget_data
+    url = url.format(**urls)
+    # Бюджет считается для холодного кеша: попадание в кеш
+    # не должно скрывать N+1.
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code < 400, response.content
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if not TRANSACTION_SQL.match(query['sql'])
+        ]
+    assert len(queries) <= budget, '\n'.join(queries)
@@ -0,0 +1,89 @@
+import base64
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipes.models import Ingredient, Recipe, Tag
+
+URL = '/api/recipes/'
+
+
+def get_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+        )
+
+
+@pytest.fixture
+def recipe_payload(db):
+    tag = Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i:02}', measurement_unit='г')
+        for i in range(20)
+        )
+    ingredient_ids = list(
+        Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+
+    def make(size):
+        return {
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in ingredient_ids[:size]
+                ],
+            'name': 'Рецепт',
+            'image': get_image(),
+            'text': 'Описание',
+            'cooking_time': 10,
+            }
+    return make
+
+
+def count_queries(request, *args):
+    with CaptureQueriesContext(connection) as queries:
+        response = request(*args, format='json')
+    assert response.status_code < 400, response.content
+    return len(queries)
+
+
+def test_create_and_update_run_constant_queries(user_client, recipe_payload):
+    # Уже загруженная картинка берёт копии у другого рецепта: замеры
+    # сравнивают одинаковый случай.
+    count_queries(user_client.post, URL, recipe_payload(2))
+    created = {
+        size: count_queries(user_client.post, URL, recipe_payload(size))
+        for size in (2, 20)
+        }
+    assert created[2] == created[20]
+
+    recipe = Recipe.objects.order_by('id').first()
+    updated = {
+        size: count_queries(
+            user_client.put,
+            f'{URL}{recipe.id}/',
+            recipe_payload(size)
+            )
+        for size in (2, 20)
+        }
+    assert updated[2] == updated[20]
+    assert recipe.ingredientamount_set.count() == 20
+
+
+@pytest.mark.parametrize('get_id', [
+    # Повтор ингредиента и несуществующий id.
+    lambda ingredients: ingredients[0]['id'],
+    lambda ingredients: 10 ** 6,
+    ])
+def test_invalid_ingredients_are_rejected(
+        user_client, recipe_payload, get_id):
+    payload = recipe_payload(2)
+    payload['ingredients'][1]['id'] = get_id(payload['ingredients'])
+    response = user_client.post(URL, payload, format='json')
+    assert response.status_code == 400
+    assert not Recipe.objects.exists()
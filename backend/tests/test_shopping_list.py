@@ -0,0 +1,24 @@
+import pytest
+
+from .conftest import fill_cart, wait_for_export
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.mark.parametrize('size', [1, 30])
+@pytest.mark.parametrize('export_format', ['pdf', 'csv'])
+def test_download_runs_constant_queries(
+        user, user_client, django_assert_num_queries, size, export_format):
+    fill_cart(user, size)
+    if export_format == 'pdf':
+        # Первый GET ставит сборку в очередь, следующий отдаёт файл.
+        wait_for_export(user_client, user_client.get(URL).json()['id'])
+    # Токен и один сгруппированный запрос, сколько бы ни было рецептов.
+    with django_assert_num_queries(2):
+        response = user_client.get(URL, {'format': export_format})
+        content = b''.join(response.streaming_content)
+    assert response.status_code == 200
+    if export_format == 'csv':
+        lines = content.decode().splitlines()
+        assert len(lines) == 11
+        assert f'ингредиент 0,г,{5 * size}' in lines
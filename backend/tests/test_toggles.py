@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+from django.db import connection
+
+from recipes.models import Favorite, Follow, Recipe, ShoppingCart
+
+from .conftest import create_user, get_client
+
+THREADS = 8
+
+
+def fire(user, url):
+    """
+    Отправляет url от имени user одновременно из THREADS потоков, каждый
+    со своим клиентом и соединением с базой, и возвращает статусы ответов.
+    """
+    clients = [get_client(user) for _ in range(THREADS)]
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def request(client):
+        try:
+            barrier.wait()
+            statuses.append(client.get(url).status_code)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=request, args=(client,)) for client in clients
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(statuses)
+
+
+@pytest.fixture
+def toggle_data(transactional_db):
+    user, author = create_user(0), create_user(1)
+    recipe = Recipe.objects.create(
+        author=author,
+        name='Рецепт',
+        image='image/recipe.png',
+        text='Описание',
+        cooking_time=10,
+        )
+    return user, author, recipe
+
+
+@pytest.mark.parametrize('url, model', [
+    ('/api/recipes/{recipe}/favorite/', Favorite),
+    ('/api/recipes/{recipe}/shopping_cart/', ShoppingCart),
+    ('/api/users/{author}/subscribe/', Follow),
+    ])
+def test_concurrent_toggle_creates_one_row(toggle_data, url, model):
+    user, author, recipe = toggle_data
+    statuses = fire(user, url.format(recipe=recipe.id, author=author.id))
+    assert statuses == [201] + [400] * (THREADS - 1)
+    assert model.objects.count() == 1
@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from recipes import versions
+
+THREADS = 8
+
+
+# Вне транзакции on_commit выполняет изменение версии сразу.
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_bumps_are_not_lost(monkeypatch):
+    before = versions.get_version('tags')
+    # Часы стоят, и все потоки прочитали версию до того, как любой
+    # из них её изменил.
+    barrier = threading.Barrier(THREADS)
+    get_version = versions.get_version
+
+    def read_together(name):
+        version = get_version(name)
+        barrier.wait()
+        return version
+
+    with monkeypatch.context() as patch:
+        patch.setattr(versions.time, 'time', lambda: before / 1000)
+        patch.setattr(versions, 'get_version', read_together)
+        threads = [
+            threading.Thread(target=versions.bump_version, args=('tags',))
+            for _ in range(THREADS)
+            ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert get_version('tags') == before + THREADS
@@ -8,13 +8,13 @@ class UserAdmin(admin.ModelAdmin):
         'pk',
         'username',
         'email',
+        'recipes_count',
+        'followers_count',
         )
     search_fields = (
-        'username',
-        'email')
-    list_filter = (
-        'username',
-        'email')
+        '^username',
+        '^email')
+    show_full_result_count = False
 
 
 admin.site.register(CustomUser, UserAdmin)
@@ -18,6 +18,14 @@ class CustomUser(AbstractUser):
     last_name = models.CharField(
         max_length=150,
         verbose_name='last name')
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='recipes count')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='followers count')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
@@ -387,16 +387,42 @@ class Api {
 
   downloadFile () {
     const token = localStorage.getItem('token')
+    const headers = {
+      ...this._headers,
+      'authorization': `Token ${token}`
+    }
+    // the PDF is rendered in the background: start the export and poll it
+    const waitForExport = ({ id, status }) => {
+      if (status === 'done') {
+        return fetch(
+          `/api/recipes/shopping_cart_exports/${id}/download/`,
+          {
+            method: 'GET',
+            headers
+          }
+        ).then(this.checkFileDownloadResponse)
+      }
+      if (status !== 'pending') {
+        return Promise.reject()
+      }
+      return new Promise(resolve => setTimeout(resolve, 1000))
+        .then(_ => fetch(
+          `/api/recipes/shopping_cart_exports/${id}/`,
+          {
+            method: 'GET',
+            headers
+          }
+        ))
+        .then(this.checkResponse)
+        .then(waitForExport)
+    }
     return fetch(
       `/api/recipes/download_shopping_cart/`,
       {
-        method: 'GET',
-        headers: {
-          ...this._headers,
-          'authorization': `Token ${token}`
-        }
+        method: 'POST',
+        headers
       }
-    ).then(this.checkFileDownloadResponse)
+    ).then(this.checkResponse).then(waitForExport)
   }
 }
 
@@ -8,7 +8,7 @@ import cn from 'classnames'
 import { useRouteMatch, useParams, useHistory } from 'react-router-dom'
 import MetaTags from 'react-meta-tags'
 
-import { useRecipe } from '../../utils/index.js'
+import { useRecipe, imageVariant } from '../../utils/index.js'
 import api from '../../api'
 
 const SingleCard = ({ loadItem, updateOrders }) => {
@@ -42,6 +42,7 @@ const SingleCard = ({ loadItem, updateOrders }) => {
   const {
     author = {},
     image,
+    image_variants,
     tags,
     cooking_time,
     name,
@@ -59,7 +60,7 @@ const SingleCard = ({ loadItem, updateOrders }) => {
         <meta property="og:title" content={name} />
       </MetaTags>
       <div className={styles['single-card']}>
-        <img src={image} alt={name} className={styles["single-card__image"]} />
+        <img src={imageVariant({ image, image_variants }, 'webp')} alt={name} className={styles["single-card__image"]} />
         <div className={styles["single-card__info"]}>
           <div className={styles["single-card__header-info"]}>
               <h1 className={styles["single-card__title"]}>{name}</h1>
@@ -0,0 +1,7 @@
+// url of a resized copy of the recipe image (thumbnail, thumbnail_webp, webp),
+// the original image if the api did not return one
+const imageVariant = ({ image, image_variants }, variant) => {
+  return (image_variants && image_variants[variant]) || image
+}
+
+export default imageVariant
@@ -1,4 +1,5 @@
 import hexToRgba from './hex-to-rgba'
+import imageVariant from './image-variant'
 import { useForm, useFormWithValidation } from './validation'
 import { useTags } from './use-tags'
 import useRecipes from './use-recipes'
@@ -7,6 +8,7 @@ import useSubscriptions from './use-subscriptions'
 
 export {
   hexToRgba,
+  imageVariant,
   useForm,
   useFormWithValidation,
   useTags,